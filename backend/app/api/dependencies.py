@@ -6,6 +6,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import decode_token
 from app.models.user import User
 from app.core.config import settings
+from app.core.tracing import traced
 
 # Use mock client in test mode
 if settings.TESTING:
@@ -16,6 +17,7 @@ else:
 security = HTTPBearer(auto_error=False)
 
 
+@traced("auth")
 async def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
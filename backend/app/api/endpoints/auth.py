@@ -12,6 +12,7 @@ from app.core.security import (
     create_access_token, create_refresh_token, decode_token
 )
 from app.api.dependencies import get_current_user
+from app.core.ids import new_id
 from app.core.config import settings
 
 # Use mock client in test mode
@@ -35,7 +36,7 @@ async def register(user_data: UserCreate):
         )
     
     # Create user document
-    user_id = f"user_{int(datetime.utcnow().timestamp() * 1000)}"
+    user_id = new_id("user")
     user_doc = {
         "id": user_id,
         "email": user_data.email,
@@ -0,0 +1,98 @@
+"""Outline history endpoints: undo, redo and point-in-time restore"""
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+
+from app.models.history import HistoryEntry, HistoryList, HistoryState, RestoreRequest
+from app.models.user import User
+from app.api.dependencies import get_current_user
+from app.services.history_service import HistoryError, history_service, summarize
+from app.services.search_service import search_service
+from app.core.config import settings
+
+# Use mock client in test mode
+if settings.TESTING:
+    from app.db.mock_cosmos import mock_cosmos_client as cosmos_client
+else:
+    from app.db.cosmos import cosmos_client
+
+router = APIRouter(prefix="/outlines/{outline_id}/history", tags=["history"])
+
+
+async def get_outline(outline_id: str, user_id: str):
+    outline = await cosmos_client.get_document(outline_id, user_id)
+    if not outline:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Outline not found"
+        )
+    return outline
+
+
+async def save(outline, user_id: str, entry) -> HistoryState:
+    """Persist a replayed outline and describe the new position"""
+    outline["itemCount"] = len(outline.get("items", []))
+    outline["updatedAt"] = datetime.utcnow().isoformat()
+    await cosmos_client.update_document(outline["id"], outline)
+    search_service.index_outline(user_id, outline)
+    return HistoryState(
+        **history_service.position(outline),
+        entry=HistoryEntry(**summarize(entry)) if entry else None
+    )
+
+
+@router.get("", response_model=HistoryList)
+async def get_history(
+    outline_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """List the outline's latest history entries, newest first"""
+    outline = await get_outline(outline_id, current_user.id)
+    entries = await history_service.entries(outline, limit)
+    return HistoryList(**history_service.position(outline), entries=entries)
+
+
+@router.post("/undo", response_model=HistoryState)
+async def undo(
+    outline_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Revert the latest change that has not been undone"""
+    outline = await get_outline(outline_id, current_user.id)
+    try:
+        entry = await history_service.undo(outline, current_user.id)
+    except HistoryError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return await save(outline, current_user.id, entry)
+
+
+@router.post("/redo", response_model=HistoryState)
+async def redo(
+    outline_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Re-apply the most recently undone change"""
+    outline = await get_outline(outline_id, current_user.id)
+    try:
+        entry = await history_service.redo(outline, current_user.id)
+    except HistoryError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return await save(outline, current_user.id, entry)
+
+
+@router.post("/restore", response_model=HistoryState)
+async def restore(
+    outline_id: str,
+    request: RestoreRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Restore the outline as it was after entry ``seq``
+
+    The restore is recorded as a new entry, so it can be undone.
+    """
+    outline = await get_outline(outline_id, current_user.id)
+    try:
+        entry = await history_service.restore(outline, request.seq, current_user.id)
+    except HistoryError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return await save(outline, current_user.id, entry)
@@ -6,12 +6,17 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 import os
 import json
+import logging
 from datetime import datetime
 import openai
 from openai import OpenAI
 
 from app.api.dependencies import get_current_user
 from app.models.user import User
+from app.services.ordering import item_sort_key
+from app.core.metrics import track_ai_call
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/outlines/{outline_id}/llm-action", tags=["llm"])
 
@@ -52,12 +57,12 @@ def get_mock_response(action: LLMActionRequest) -> Dict[str, Any]:
     """
     prompt_lower = action.userPrompt.lower()
     
-    print(f"Getting mock response for: type={action.type}, prompt='{action.userPrompt[:50]}'")
+    logger.debug("Getting mock response", extra={"actionType": action.type, "prompt": action.userPrompt})
     
     # Simple keyword matching for mock responses
     if action.type == "create":
         if "spov" in prompt_lower or "spiky pov" in prompt_lower or "strategic point" in prompt_lower or "retention" in prompt_lower or "churn" in prompt_lower:
-            print("Returning mock SPOV response")
+            logger.debug("Returning mock SPOV response")
             return MOCK_RESPONSES["create_spov"]
         else:
             return {
@@ -125,8 +130,8 @@ def format_outline_for_llm(outline: Dict) -> str:
     
     def add_items(parent_id, level=0):
         if parent_id in items_by_parent:
-            # Sort by order if available
-            sorted_items = sorted(items_by_parent[parent_id], key=lambda x: x.get("order", 0))
+            # Sort by rank (or legacy order) if available
+            sorted_items = sorted(items_by_parent[parent_id], key=item_sort_key)
             for item in sorted_items:
                 lines.append(format_item(item, level))
                 # Recursively add children
@@ -186,7 +191,7 @@ async def call_llm_api(action: LLMActionRequest, outline_context: Optional[Dict]
     
     if not openai_key:
         # No API key configured, return error
-        print("❌ No OpenAI API key found")
+        logger.error("No OpenAI API key found")
         raise HTTPException(
             status_code=500,
             detail="OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
@@ -194,7 +199,7 @@ async def call_llm_api(action: LLMActionRequest, outline_context: Optional[Dict]
     
     try:
         # Initialize OpenAI client
-        client = OpenAI(api_key=openai_key)
+        client = OpenAI(api_key=openai_key, base_url=settings.OPENAI_BASE_URL)
         
         # Build the system prompt with outline context if available
         existing_sections = {}
@@ -269,7 +274,7 @@ async def call_llm_api(action: LLMActionRequest, outline_context: Optional[Dict]
             else:
                 target_section = "general"
             
-            print(f"Creating content with target_section: {target_section}")
+            logger.debug("Creating content", extra={"targetSection": target_section})
             
             # Restore the working structured prompt format
             if "spov" in prompt_lower or "spiky pov" in prompt_lower or action.section == "spov":
@@ -361,45 +366,47 @@ async def call_llm_api(action: LLMActionRequest, outline_context: Optional[Dict]
         
         # Call OpenAI API
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",  # Using GPT-4o-mini - more accessible and cost-effective
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,  # Lower temperature for faster, more consistent responses
-                max_tokens=800,   # Limit response length for speed
-                timeout=15,       # 15 second timeout
-                response_format={"type": "json_object"}  # Force JSON response
-            )
-        except Exception as api_error:
-            # If response_format causes issues, try without it
-            if "response_format" in str(api_error):
-                print(f"response_format not supported, retrying without it")
+            with track_ai_call("openai", "llm_action"):
                 response = client.chat.completions.create(
-                    model="gpt-4o-mini",
+                    model="gpt-4o-mini",  # Using GPT-4o-mini - more accessible and cost-effective
                     messages=[
-                        {"role": "system", "content": system_prompt + "\nIMPORTANT: You must respond with valid JSON."},
+                        {"role": "system", "content": system_prompt},
                         {"role": "user", "content": user_prompt}
                     ],
-                    temperature=0.3,
-                    max_tokens=800,
-                    timeout=15
+                    temperature=0.3,  # Lower temperature for faster, more consistent responses
+                    max_tokens=800,   # Limit response length for speed
+                    timeout=15,       # 15 second timeout
+                    response_format={"type": "json_object"}  # Force JSON response
                 )
+        except Exception as api_error:
+            # If response_format causes issues, try without it
+            if "response_format" in str(api_error):
+                logger.warning("response_format not supported, retrying without it")
+                with track_ai_call("openai", "llm_action"):
+                    response = client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=[
+                            {"role": "system", "content": system_prompt + "\nIMPORTANT: You must respond with valid JSON."},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        temperature=0.3,
+                        max_tokens=800,
+                        timeout=15
+                    )
             else:
                 raise api_error
         
         # Parse the response
         response_text = response.choices[0].message.content
-        print(f"Raw LLM response: {response_text[:500]}...")  # Log first 500 chars
+        logger.debug("Raw LLM response", extra={"response": response_text})
         
         try:
             result = json.loads(response_text)
-            print(f"Parsed LLM result: {result}")
+            logger.debug("Parsed LLM result", extra={"response": response_text})
             
             # Ensure the result has the expected structure for create actions
             if action.type == "create" and "items" not in result:
-                print(f"Warning: LLM response missing 'items' field, wrapping content")
+                logger.warning("LLM response missing 'items' field, wrapping content")
                 # Try to salvage the response
                 if "content" in result:
                     result = {
@@ -410,24 +417,18 @@ async def call_llm_api(action: LLMActionRequest, outline_context: Optional[Dict]
                         "suggestions": result.get("suggestions", [])
                     }
                 else:
-                    print(f"Unable to salvage response, using mock")
+                    logger.warning("Unable to salvage LLM response")
                     raise HTTPException(status_code=500, detail="LLM processing failed - no mock fallback")
             
             return result
         except json.JSONDecodeError as e:
-            print(f"Failed to parse LLM response as JSON: {e}")
-            print(f"Response was: {response_text}")
+            logger.warning(f"Failed to parse LLM response as JSON: {e}", extra={"response": response_text})
             # Fall back to mock response if parsing fails
             raise HTTPException(status_code=500, detail="LLM processing failed - no mock fallback")
             
     except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"❌ Error calling OpenAI API: {str(e)}")
-        logger.error(f"❌ Full error details: {repr(e)}")
-        print(f"Error calling OpenAI API: {str(e)}")
         # No fallback to mock - raise error
-        logger.error("❌ LLM processing failed")
+        logger.error(f"Error calling OpenAI API: {e!r}")
         raise HTTPException(status_code=500, detail=f"LLM processing failed: {str(e)}")
 
 @router.post("", response_model=LLMActionResponse)
@@ -458,31 +459,37 @@ async def process_llm_action(
             outline = await cosmos_client.get_document(outline_id, current_user.id)
             if outline:
                 outline_context = outline
-                print(f"Loaded outline with {len(outline.get('items', []))} items")
+                logger.debug("Loaded outline context", extra={"outlineId": outline_id, "itemCount": len(outline.get("items", []))})
         except Exception as e:
-            print(f"Could not load outline context: {e}")
+            logger.warning(f"Could not load outline context: {e}", extra={"outlineId": outline_id})
             # Continue without context if loading fails
         
         # Log the action for analytics/debugging
-        print(f"🤖 LLM Action Request: {request.type} for outline {outline_id}")
-        print(f"📝 Prompt: {request.userPrompt[:100]}...")
+        logger.info(
+            "LLM action request",
+            extra={"actionType": request.type, "outlineId": outline_id, "prompt": request.userPrompt}
+        )
         
         # Call LLM API with outline context
         try:
             result = await call_llm_api(request, outline_context)
         except Exception as llm_error:
-            print(f"❌ LLM API call failed: {str(llm_error)}")
+            logger.error(f"LLM API call failed: {llm_error}")
             # Always return a valid response with mock data
             raise HTTPException(status_code=500, detail="LLM processing failed - no mock fallback")
         
-        print(f"✅ LLM Action completed, result keys: {list(result.keys()) if isinstance(result, dict) else 'not a dict'}")
-        if outline_context:
+        logger.info(
+            "LLM action completed",
+            extra={"outlineId": outline_id, "resultKeys": list(result) if isinstance(result, dict) else None}
+        )
+        # Section detection walks the whole outline; only do it when it is logged
+        if outline_context and logger.isEnabledFor(logging.DEBUG):
             sections = detect_outline_sections(outline_context)
-            print(f"Detected sections: {[k for k, v in sections.items() if v]}")
+            logger.debug("Detected sections", extra={"sections": [k for k, v in sections.items() if v]})
         
         # Ensure we always return a valid response
         if not result:
-            print("⚠️ Empty result, using mock response")
+            logger.warning("Empty LLM result")
             raise HTTPException(status_code=500, detail="LLM processing failed - no mock fallback")
         
         return LLMActionResponse(
@@ -491,7 +498,7 @@ async def process_llm_action(
         )
         
     except Exception as e:
-        print(f"Error processing LLM action: {str(e)}")
+        logger.error(f"Error processing LLM action: {e}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to process LLM action: {str(e)}"
@@ -1,18 +1,29 @@
 """Outline management endpoints"""
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, File, UploadFile
+from fastapi.responses import StreamingResponse
 
 from app.models.outline import (
     Outline, OutlineCreate, OutlineWithItems,
     OutlineItem, ItemCreate, ItemUpdate,
     BatchOperation, BatchOperationRequest, BatchOperationResponse,
-    TemplateRequest, OperationType
+    TemplateRequest, OperationType, ImportStatus
 )
 from app.models.user import User
 from app.api.dependencies import get_current_user
 from app.services.outline_service import OutlineService
+from app.services.batch_service import BatchExecutor
+from app.services.search_service import search_service
+from app.services.history_service import history_service
+from app.services.item_record import iter_encode_records
+from app.services.export_service import OutlineExporter, EXPORT_FORMATS
+from app.services.import_service import (
+    OutlineImporter, ImportParseError, create_parser, detect_format
+)
+from app.services.ordering import spread_ranks
 from app.core.config import settings
+from app.core.ids import new_id
 
 # Use mock client in test mode
 if settings.TESTING:
@@ -23,6 +34,9 @@ else:
 router = APIRouter()
 outline_service = OutlineService()
 
+# Bytes read from an upload at a time during imports
+IMPORT_CHUNK_SIZE = 64 * 1024
+
 
 @router.get("", response_model=List[Outline])
 async def get_outlines(
@@ -64,7 +78,7 @@ async def create_outline(
 ):
     """Create a new outline"""
     # Create outline document with current user's ID
-    outline_id = f"outline_{int(datetime.utcnow().timestamp() * 1000)}"
+    outline_id = new_id("outline")
     outline_doc = {
         "id": outline_id,
         "title": outline_data.title,
@@ -77,6 +91,7 @@ async def create_outline(
     
     # Save to database
     await cosmos_client.create_document(outline_doc)
+    search_service.index_outline(current_user.id, outline_doc)
     
     return Outline(**outline_doc)
 
@@ -122,13 +137,20 @@ async def update_outline(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Update fields
     if "title" in update_data:
         outline["title"] = update_data["title"]
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "update_outline", current_user.id)
+    
     # Save to database
     updated = await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, updated)
     
     return Outline(
         id=updated["id"],
@@ -157,14 +179,22 @@ async def delete_outline(
     
     # Delete from database
     await cosmos_client.delete_document(outline_id, current_user.id)
+    search_service.remove_outline(current_user.id, outline_id)
+    await history_service.forget(outline_id)
 
 
 @router.get("/{outline_id}/items", response_model=List[OutlineItem])
 async def get_outline_items(
     outline_id: str,
+    root: Optional[str] = Query(None, description="Only return the subtree under this item"),
+    depth: Optional[int] = Query(None, ge=0, description="Levels to include below the starting items"),
     current_user: User = Depends(get_current_user)
 ):
-    """Get outline items in hierarchical structure"""
+    """Get outline items in hierarchical structure
+    
+    With ``root`` and/or ``depth`` only a slice of the tree is returned, so
+    collapsed branches can be loaded lazily.
+    """
     # Get outline from database
     outline = await cosmos_client.get_document(outline_id, current_user.id)
     
@@ -175,8 +205,44 @@ async def get_outline_items(
         )
     
     # Build hierarchical structure from flat items
-    items = outline.get("items", [])
-    return outline_service.build_item_tree(items)
+    records = outline_service.build_records(outline.get("items", []), root, depth)
+    if records is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Item not found"
+        )
+    
+    # Stream the compact records as JSON rather than validating response models
+    return StreamingResponse(iter_encode_records(records), media_type="application/json")
+
+
+@router.get("/{outline_id}/export")
+async def export_outline(
+    outline_id: str,
+    format: str = Query("md", pattern="^(md|opml|json)$", description="Export format: md, opml or json"),
+    compress: bool = Query(False, alias="gzip", description="Gzip the response body"),
+    current_user: User = Depends(get_current_user)
+):
+    """Export an outline as a streamed Markdown, OPML or JSON download"""
+    # Get outline from database
+    outline = await cosmos_client.get_document(outline_id, current_user.id)
+    
+    if not outline:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Outline not found"
+        )
+    
+    # Stream chunks straight from the item index instead of building the tree
+    exporter = OutlineExporter(outline, outline_service)
+    headers = {"Content-Disposition": f'attachment; filename="{exporter.filename(format)}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        exporter.stream(format, compress),
+        media_type=EXPORT_FORMATS[format][0],
+        headers=headers
+    )
 
 
 @router.post("/{outline_id}/items", response_model=OutlineItem, status_code=status.HTTP_201_CREATED)
@@ -195,35 +261,40 @@ async def create_item(
             detail="Outline not found"
         )
     
-    # Create new item with unique ID (using microseconds and random component to avoid collisions)
-    import random
-    item_id = f"item_{int(datetime.utcnow().timestamp() * 1000000)}_{random.randint(100, 999)}"
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
     
-    # Calculate order (number of siblings)
-    items = outline.get("items", [])
-    siblings = [i for i in items if i.get("parentId") == item_data.parentId]
-    order = len(siblings)
+    # Create new item with a unique, time-sortable ID
+    item_id = new_id("item")
     
+    items = outline.get("items", [])
     new_item = {
         "id": item_id,
         "content": item_data.content,
         "parentId": item_data.parentId,
         "outlineId": outline_id,
-        "order": order,
+        "order": 0,
         "style": item_data.style,
         "formatting": item_data.formatting,
         "createdAt": datetime.utcnow().isoformat(),
         "updatedAt": datetime.utcnow().isoformat()
     }
     
+    # Append after the last sibling; only the new item gets a rank
+    outline_service.place_item(items, new_item, item_data.parentId)
+    
     # Add to outline
     items.append(new_item)
     outline["items"] = items
     outline["itemCount"] = len(items)
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "create_item", current_user.id)
+    
     # Save to database
     await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, outline)
     
     return OutlineItem(**new_item)
 
@@ -245,6 +316,9 @@ async def update_item(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Find and update item
     items = outline.get("items", [])
     item_found = False
@@ -253,10 +327,9 @@ async def update_item(
         if item["id"] == item_id:
             if update_data.content is not None:
                 item["content"] = update_data.content
-            if update_data.parentId is not None:
-                item["parentId"] = update_data.parentId
-            if update_data.order is not None:
-                item["order"] = update_data.order
+            if update_data.parentId is not None or update_data.order is not None:
+                parent_id = update_data.parentId if update_data.parentId is not None else item.get("parentId")
+                outline_service.place_item(items, item, parent_id, update_data.order)
             if update_data.style is not None:
                 item["style"] = update_data.style
             if update_data.formatting is not None:
@@ -276,10 +349,14 @@ async def update_item(
     outline["items"] = items
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "update_item", current_user.id)
+    
     # Save to database
     await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, outline)
     
-    return OutlineItem(**updated_item)
+    return OutlineItem(**{**updated_item, "order": outline_service.sibling_position(items, updated_item)})
 
 
 @router.delete("/{outline_id}/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -298,6 +375,9 @@ async def delete_item(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Remove item and children
     items = outline.get("items", [])
     items_to_remove = outline_service.get_item_and_children(items, item_id)
@@ -307,8 +387,12 @@ async def delete_item(
     outline["itemCount"] = len(outline["items"])
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "delete_item", current_user.id)
+    
     # Save to database
     await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, outline)
 
 
 @router.post("/{outline_id}/items/{item_id}/indent", response_model=OutlineItem)
@@ -327,6 +411,9 @@ async def indent_item(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Perform indent operation
     items = outline.get("items", [])
     updated_item = outline_service.indent_item(items, item_id)
@@ -341,8 +428,12 @@ async def indent_item(
     outline["items"] = items
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "indent_item", current_user.id)
+    
     # Save to database
     await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, outline)
     
     return OutlineItem(**updated_item)
 
@@ -363,6 +454,9 @@ async def outdent_item(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Perform outdent operation
     items = outline.get("items", [])
     updated_item = outline_service.outdent_item(items, item_id)
@@ -377,8 +471,12 @@ async def outdent_item(
     outline["items"] = items
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "outdent_item", current_user.id)
+    
     # Save to database
     await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, outline)
     
     return OutlineItem(**updated_item)
 
@@ -389,8 +487,6 @@ async def batch_operations(
     current_user: User = Depends(get_current_user)
 ):
     """Execute multiple operations in a single request"""
-    import random
-    
     # Get outline
     outline = await cosmos_client.get_document(outline_id, current_user.id)
     
@@ -400,74 +496,41 @@ async def batch_operations(
             detail="Outline not found"
         )
     
-    items = outline.get("items", [])
-    errors = []
-    
-    # Process each operation
-    for op in request.operations:
-        try:
-            if op.type == OperationType.CREATE:
-                # Generate ID server-side
-                item_id = f"item_{int(datetime.utcnow().timestamp() * 1000000)}_{random.randint(100, 999)}"
-                
-                # Calculate order
-                siblings = [i for i in items if i.get("parentId") == op.parentId]
-                order = op.position if op.position is not None else len(siblings)
-                
-                new_item = {
-                    "id": item_id,
-                    "content": op.data.get("text", op.data.get("content", "")),
-                    "parentId": op.parentId,
-                    "outlineId": outline_id,
-                    "order": order,
-                    "style": op.data.get("style"),
-                    "formatting": op.data.get("formatting"),
-                    "createdAt": datetime.utcnow().isoformat(),
-                    "updatedAt": datetime.utcnow().isoformat()
-                }
-                items.append(new_item)
-                
-            elif op.type == OperationType.UPDATE:
-                for item in items:
-                    if item["id"] == op.id:
-                        if op.data:
-                            if "text" in op.data or "content" in op.data:
-                                item["content"] = op.data.get("text", op.data.get("content"))
-                            if "style" in op.data:
-                                item["style"] = op.data["style"]
-                            if "formatting" in op.data:
-                                item["formatting"] = op.data["formatting"]
-                        if op.parentId is not None:
-                            item["parentId"] = op.parentId
-                        if op.position is not None:
-                            item["order"] = op.position
-                        item["updatedAt"] = datetime.utcnow().isoformat()
-                        break
-                        
-            elif op.type == OperationType.DELETE:
-                # Remove item and its children
-                items_to_remove = outline_service.get_item_and_children(items, op.id)
-                items = [i for i in items if i["id"] not in items_to_remove]
-                
-            elif op.type == OperationType.MOVE:
-                for item in items:
-                    if item["id"] == op.id:
-                        item["parentId"] = op.parentId
-                        if op.position is not None:
-                            item["order"] = op.position
-                        item["updatedAt"] = datetime.utcnow().isoformat()
-                        break
-                        
-        except Exception as e:
-            errors.append(f"Operation failed for {op.type} {op.id}: {str(e)}")
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
     
-    # Update outline
-    outline["items"] = items
-    outline["itemCount"] = len(items)
-    outline["updatedAt"] = datetime.utcnow().isoformat()
+    # Apply every operation against a single index of the items
+    executor = BatchExecutor(outline.get("items", []), outline_id, outline_service)
+    results = executor.execute(request.operations)
+    errors = [
+        f"Operation failed for {result.type.value} {result.id}: {result.error}"
+        for result in results if not result.success
+    ]
     
-    # Save to database
-    await cosmos_client.update_document(outline_id, outline)
+    if errors and request.atomic:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Batch rolled back",
+                "errors": errors,
+                "results": [result.model_dump() for result in results]
+            }
+        )
+    
+    items = executor.items
+    
+    if executor.changed_ids():
+        # Update outline
+        outline["items"] = items
+        outline["itemCount"] = len(items)
+        outline["updatedAt"] = datetime.utcnow().isoformat()
+        
+        # Record the change for undo and restore
+        await history_service.record(outline, tracker, "batch_operations", current_user.id)
+        
+        # Save to database in a single write
+        await cosmos_client.update_document(outline_id, outline)
+        search_service.index_outline(current_user.id, outline)
     
     # Build hierarchical response
     hierarchical_items = outline_service.build_item_tree(items)
@@ -475,7 +538,8 @@ async def batch_operations(
     return BatchOperationResponse(
         success=len(errors) == 0,
         items=hierarchical_items,
-        errors=errors
+        errors=errors,
+        results=results
     )
 
 
@@ -486,8 +550,6 @@ async def create_from_template(
     current_user: User = Depends(get_current_user)
 ):
     """Create items from a template structure"""
-    import random
-    
     # Get outline
     outline = await cosmos_client.get_document(outline_id, current_user.id)
     
@@ -497,19 +559,23 @@ async def create_from_template(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Clear existing items if requested
     if request.clearExisting:
         outline["items"] = []
     
     items = outline.get("items", [])
     
-    def create_items_recursive(template_items, parent_id=None):
+    def create_items_recursive(template_items, parent_id=None, ranks=None):
         """Recursively create items from template"""
         created_items = []
+        ranks = ranks or spread_ranks(len(template_items))
         
         for idx, template_item in enumerate(template_items):
             # Generate server-side ID
-            item_id = f"item_{int(datetime.utcnow().timestamp() * 1000000)}_{random.randint(100, 999)}"
+            item_id = new_id("item")
             
             # Create the item
             new_item = {
@@ -518,6 +584,7 @@ async def create_from_template(
                 "parentId": parent_id,
                 "outlineId": outline_id,
                 "order": idx,
+                "rank": ranks[idx],
                 "style": template_item.get("style"),
                 "formatting": template_item.get("formatting"),
                 "createdAt": datetime.utcnow().isoformat(),
@@ -539,15 +606,149 @@ async def create_from_template(
         
         return created_items
     
-    # Create all template items
-    hierarchical_items = create_items_recursive(request.items)
+    # Create all template items, appended after any existing root items
+    root_ranks = outline_service.append_ranks(items, None, len(request.items))
+    hierarchical_items = create_items_recursive(request.items, ranks=root_ranks)
     
     # Update outline
     outline["items"] = items
     outline["itemCount"] = len(items)
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "create_from_template", current_user.id)
+    
     # Save to database
     await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, outline)
     
     return hierarchical_items
+
+
+@router.post("/{outline_id}/import", response_model=ImportStatus)
+async def import_items(
+    outline_id: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(md|opml)$", description="Defaults to the file extension"),
+    parentId: Optional[str] = Query(None, description="Import below this item instead of the top level"),
+    resume: Optional[str] = Query(None, description="importId of an interrupted import to continue"),
+    current_user: User = Depends(get_current_user)
+):
+    """Import a Markdown or OPML document, streaming it into the outline
+    
+    The upload is parsed incrementally and written in batches of
+    IMPORT_BATCH_SIZE items together with a checkpoint. If the request is
+    interrupted, posting the same file again with ``resume`` skips what was
+    already written.
+    """
+    # Get outline
+    outline = await cosmos_client.get_document(outline_id, current_user.id)
+    
+    if not outline:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Outline not found"
+        )
+    
+    items = outline.setdefault("items", [])
+    now = datetime.utcnow().isoformat()
+    # Each saved batch becomes one history entry
+    tracker = history_service.track(outline)
+    
+    if resume:
+        state = outline.get("importState")
+        if not state or state["importId"] != resume:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Import not found"
+            )
+        if state["status"] == "completed":
+            return ImportStatus(**state)
+        importer = OutlineImporter(outline, state=state)
+    else:
+        if parentId and not any(item["id"] == parentId for item in items):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Parent item not found"
+            )
+        importer = OutlineImporter(outline, parentId)
+        importer.state.update(
+            format=format or detect_format(file.filename, file.content_type),
+            filename=file.filename,
+            batches=0,
+            startedAt=now
+        )
+    state = importer.state
+    state.update(status="running", error=None)
+    
+    async def save(import_status: str):
+        """Write imported items and the checkpoint in one update"""
+        nonlocal tracker
+        await history_service.record(outline, tracker, "import_items", current_user.id)
+        tracker = history_service.track(outline)
+        state["status"] = import_status
+        state["batches"] += 1
+        state["updatedAt"] = datetime.utcnow().isoformat()
+        outline["importState"] = state
+        outline["itemCount"] = len(items)
+        outline["updatedAt"] = state["updatedAt"]
+        await cosmos_client.update_document(outline_id, outline)
+    
+    parser = create_parser(state["format"])
+    already_imported = importer.processed
+    unsaved = 0
+    try:
+        while True:
+            chunk = await file.read(IMPORT_CHUNK_SIZE)
+            entries = parser.feed(chunk) if chunk else parser.close()
+            for level, content, style in entries:
+                # Entries written before an interruption are skipped on resume
+                if already_imported:
+                    already_imported -= 1
+                    continue
+                items.append(importer.add(level, content, style))
+                unsaved += 1
+                if unsaved >= settings.IMPORT_BATCH_SIZE:
+                    await save("running")
+                    unsaved = 0
+            if not chunk:
+                break
+        if already_imported:
+            raise ImportParseError("Upload is shorter than the interrupted import")
+    except ImportParseError as e:
+        state["error"] = str(e)
+        await save("failed")
+        search_service.index_outline(current_user.id, outline)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": str(e), "importId": state["importId"], "processed": state["processed"]}
+        )
+    
+    await save("completed")
+    search_service.index_outline(current_user.id, outline)
+    
+    return ImportStatus(**state)
+
+
+@router.get("/{outline_id}/import", response_model=ImportStatus)
+async def get_import_status(
+    outline_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get the progress of the outline's latest import"""
+    # Get outline
+    outline = await cosmos_client.get_document(outline_id, current_user.id)
+    
+    if not outline:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Outline not found"
+        )
+    
+    if not outline.get("importState"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found"
+        )
+    
+    return ImportStatus(**outline["importState"])
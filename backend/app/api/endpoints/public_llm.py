@@ -2,10 +2,13 @@
 Public LLM endpoint that doesn't require authentication
 This allows the frontend to use LLM features without login
 """
+import logging
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 from app.api.endpoints.llm_actions import LLMActionRequest, LLMActionResponse, call_llm_api
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # Default Brainlift template structure for context - matches the actual template
@@ -46,5 +49,5 @@ async def public_llm_action(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error in public LLM action: {str(e)}")
+        logger.error(f"Error in public LLM action: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
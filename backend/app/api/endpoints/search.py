@@ -0,0 +1,27 @@
+"""Search endpoints"""
+from fastapi import APIRouter, Depends, Query
+
+from app.models.search import SearchResponse
+from app.models.user import User
+from app.api.dependencies import get_current_user
+from app.services.search_service import search_service
+from app.core.config import settings
+
+# Use mock client in test mode
+if settings.TESTING:
+    from app.db.mock_cosmos import mock_cosmos_client as cosmos_client
+else:
+    from app.db.cosmos import cosmos_client
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchResponse)
+async def search_items(
+    q: str = Query(..., min_length=1, description="Search query"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Search item content across all of the user's outlines"""
+    results = await search_service.search(current_user.id, q, cosmos_client, limit)
+    return SearchResponse(query=q, results=results)
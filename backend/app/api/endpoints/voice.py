@@ -12,8 +12,12 @@ from app.models.user import User
 from app.models.outline import OutlineItem
 from app.api.dependencies import get_current_user
 from app.services.voice_service import VoiceService
+from app.services.outline_service import outline_service
+from app.services.search_service import search_service
+from app.services.history_service import history_service
 from app.services.ai_voice_service import ai_voice_service
 from app.core.config import settings
+from app.core.ids import new_id
 
 # Use mock client in test mode
 if settings.TESTING:
@@ -105,15 +109,22 @@ async def update_outline_with_voice(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Process voice command
     updated_outline = voice_service.process_voice_command(
         outline,
         request.command
     )
     
+    # Record the change for undo and restore
+    await history_service.record(updated_outline, tracker, "voice_command", current_user.id)
+    
     # Save to database
     updated_outline["updatedAt"] = datetime.utcnow().isoformat()
     await cosmos_client.update_document(outline_id, updated_outline)
+    search_service.index_outline(current_user.id, updated_outline)
     
     return {
         "message": "Outline updated successfully",
@@ -138,6 +149,9 @@ async def add_items_with_voice(
             detail="Outline not found"
         )
     
+    # Track changes for the outline history
+    tracker = history_service.track(outline)
+    
     # Structure text if requested
     if request.structureFirst:
         structured = voice_service.mock_structure_text(request.text)
@@ -150,7 +164,7 @@ async def add_items_with_voice(
     new_items = []
     
     for struct_item in structured:
-        item_id = f"item_{int(datetime.utcnow().timestamp() * 1000)}"
+        item_id = new_id("item")
         
         # Determine parent based on level
         parent_id = request.parentId
@@ -166,12 +180,13 @@ async def add_items_with_voice(
             "content": struct_item.content,
             "parentId": parent_id,
             "outlineId": outline_id,
-            "order": len([i for i in items if i.get("parentId") == parent_id]),
+            "order": 0,
             "level": struct_item.level,  # Keep for reference
             "createdAt": datetime.utcnow().isoformat(),
             "updatedAt": datetime.utcnow().isoformat()
         }
         
+        outline_service.place_item(items, new_item, parent_id)
         items.append(new_item)
         new_items.append(new_item)
     
@@ -180,8 +195,12 @@ async def add_items_with_voice(
     outline["itemCount"] = len(items)
     outline["updatedAt"] = datetime.utcnow().isoformat()
     
+    # Record the change for undo and restore
+    await history_service.record(outline, tracker, "voice_add_items", current_user.id)
+    
     # Save to database
     await cosmos_client.update_document(outline_id, outline)
+    search_service.index_outline(current_user.id, outline)
     
     # Return new items (without level field for response)
     return [
@@ -191,6 +210,7 @@ async def add_items_with_voice(
             parentId=item["parentId"],
             outlineId=item["outlineId"],
             order=item["order"],
+            rank=item["rank"],
             createdAt=item["createdAt"],
             updatedAt=item["updatedAt"]
         )
@@ -1,7 +1,7 @@
 """Main API router that combines all endpoint routers"""
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, outlines, voice, llm_actions, public_llm
+from app.api.endpoints import auth, outlines, voice, llm_actions, public_llm, search, history
 
 api_router = APIRouter()
 
@@ -9,6 +9,8 @@ api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(outlines.router, prefix="/outlines", tags=["outlines"])
 api_router.include_router(voice.router, prefix="/voice", tags=["voice"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
 api_router.include_router(llm_actions.router, tags=["llm"])
+api_router.include_router(history.router, tags=["history"])
 # Public LLM endpoint - no authentication required
 api_router.include_router(public_llm.router, tags=["public"])
\ No newline at end of file
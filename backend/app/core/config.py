@@ -36,13 +36,45 @@ class Settings(BaseSettings):
     COSMOS_DATABASE_NAME: str = "BrainFlowy"
     COSMOS_USERS_CONTAINER: str = "Users"
     COSMOS_DOCS_CONTAINER: str = "Docs"
+    COSMOS_HISTORY_CONTAINER: str = "History"
     
     # OpenAI (for Whisper and GPT)
     OPENAI_API_KEY: Optional[str] = Field(default=None)
+    # Alternative OpenAI-compatible endpoint (e.g. the load test's fake server)
+    OPENAI_BASE_URL: Optional[str] = Field(default=None)
     
     # Claude API
     ANTHROPIC_API_KEY: Optional[str] = Field(default=None)
     
+    # ID generation (node component; random per process when unset)
+    ID_NODE: Optional[int] = Field(default=None)
+    
+    # Search index files (kept next to the local data store)
+    SEARCH_INDEX_DIR: str = Field(default="search_index")
+    
+    # Streaming imports: items written per database update
+    IMPORT_BATCH_SIZE: int = Field(default=1000)
+    
+    # Outline history: a full snapshot every N entries; entries kept for undo/restore
+    HISTORY_SNAPSHOT_INTERVAL: int = Field(default=50)
+    HISTORY_RETENTION: int = Field(default=500)
+    
+    # Prometheus metrics middleware and /metrics endpoint
+    METRICS_ENABLED: bool = Field(default=True)
+    
+    # Request tracing: Server-Timing header and sampled traces (JSON lines)
+    SERVER_TIMING_ENABLED: bool = Field(default=False)
+    TRACE_SAMPLE_RATE: float = Field(default=0.0)
+    TRACE_FILE: str = Field(default="traces.jsonl")
+    
+    # Logging: "json" or "text" output, root level and per-module overrides
+    # ("app.db=WARNING,app.api.endpoints.llm_actions=DEBUG")
+    LOG_FORMAT: str = Field(default="json")
+    LOG_LEVEL: str = Field(default="INFO")
+    LOG_LEVELS: str = Field(default="")
+    LOG_DEBUG_SAMPLE_RATE: float = Field(default=1.0)
+    LOG_REDACT_PROMPTS: bool = Field(default=True)
+    
     # Test Mode
     TESTING: bool = Field(default=False)
     
@@ -0,0 +1,174 @@
+"""Structured, non-blocking logging
+
+Log calls only format the message and put the record on an in-memory
+queue; a ``QueueListener`` thread writes records to stderr, as JSON lines
+by default. Levels can be set per module, DEBUG records can be sampled,
+and prompt and LLM response bodies passed as ``extra={"prompt": ...}`` or
+``extra={"response": ...}`` are replaced by their length before they
+leave the process.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO
+
+# Extra fields that may carry user prompts or model output
+REDACTED_FIELDS = ("prompt", "response")
+
+# Attributes every LogRecord has; anything else was passed as ``extra``
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_module_loggers = []
+
+
+def redact(value: Any) -> str:
+    """Placeholder for a redacted value"""
+    return f"<redacted {len(str(value))} chars>"
+
+
+def record_extras(record: logging.LogRecord) -> Dict[str, Any]:
+    """Fields passed to a log call with ``extra``"""
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES}
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """Parse ``"app.db=WARNING,app.api.endpoints.llm_actions=DEBUG"``"""
+    levels = {}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, level = entry.partition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Unknown log level for {name.strip()}: {level.strip()}")
+        levels[name.strip()] = value
+    return levels
+
+
+class DebugSampler(logging.Filter):
+    """Keep only a fraction of DEBUG records"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class PromptRedactor(logging.Filter):
+    """Replace prompt and response extras with their length"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field in REDACTED_FIELDS:
+            if field in record.__dict__:
+                setattr(record, field, redact(record.__dict__[field]))
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(record_extras(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with extras appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = record_extras(record)
+        if extras:
+            line += " " + " ".join(f"{key}={value!r}" for key, value in extras.items())
+        return line
+
+
+class StructuredQueueHandler(QueueHandler):
+    """Queue handler that keeps extras and exception text as separate fields
+
+    The stock handler merges the traceback into the message.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def configure_logging(config=None, stream: Optional[TextIO] = None) -> QueueListener:
+    """Route all logging through a background writer thread
+
+    ``config`` defaults to the application settings. Calling it again
+    replaces the previous setup.
+    """
+    global _listener, _queue_handler
+    if config is None:
+        from app.core.config import settings as config
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter())
+
+    # Filters run on the caller's side, so dropped records never reach the queue
+    handler = StructuredQueueHandler(queue.SimpleQueue())
+    handler.setFormatter(logging.Formatter())
+    if config.LOG_DEBUG_SAMPLE_RATE < 1.0:
+        handler.addFilter(DebugSampler(config.LOG_DEBUG_SAMPLE_RATE))
+    if config.LOG_REDACT_PROMPTS:
+        handler.addFilter(PromptRedactor())
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(config.LOG_LEVEL.upper())
+    for name, level in parse_levels(config.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+        _module_loggers.append(name)
+
+    _listener = QueueListener(handler.queue, output)
+    _listener.start()
+    _queue_handler = handler
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and remove the handler"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    while _module_loggers:
+        logging.getLogger(_module_loggers.pop()).setLevel(logging.NOTSET)
+
+
+atexit.register(shutdown_logging)
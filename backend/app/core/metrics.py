@@ -0,0 +1,305 @@
+"""Prometheus-style metrics
+
+A small, dependency-free registry of counters, gauges and histograms that
+renders the Prometheus text exposition format (version 0.0.4). Labelled
+children are created once and cached, so recording a value is a dict lookup
+plus a locked add.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from app.core.tracing import span
+
+# Seconds; covers fast in-memory handlers up to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class: a named metric with labelled children"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Get the child for a set of label values"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _Value:
+    """A single float guarded by a lock"""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter"""
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            yield f"{self.name}{_label_text(self.labelnames, values)} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrement the unlabelled gauge"""
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled gauge"""
+        self.labels().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket plus the +Inf overflow; cumulated on render
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of a block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe a value on the unlabelled histogram"""
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _label_text(self.labelnames, values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _label_text(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                # Modules may be re-imported (e.g. in tests); reuse the metric
+                if not isinstance(existing, metric_class):
+                    raise ValueError(f"Metric {name} already registered as {existing.type_name}")
+                return existing
+            metric = metric_class(name, *args, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry
+metrics = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP metrics
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+HTTP_REQUESTS = metrics.counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+
+# AI provider metrics
+AI_REQUEST_DURATION = metrics.histogram(
+    "ai_request_duration_seconds", "LLM and transcription call latency", ("provider", "operation")
+)
+AI_REQUEST_ERRORS = metrics.counter(
+    "ai_request_errors_total", "Failed LLM and transcription calls", ("provider", "operation")
+)
+
+
+@contextmanager
+def track_ai_call(provider: str, operation: str):
+    """Time an AI provider call and count it if it raises"""
+    start = time.perf_counter()
+    try:
+        with span("ai", f"{provider}.{operation}"):
+            yield
+    except Exception:
+        AI_REQUEST_ERRORS.labels(provider, operation).inc()
+        raise
+    finally:
+        AI_REQUEST_DURATION.labels(provider, operation).observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and in-flight requests
+
+    Routes are labelled with their path template (``/api/v1/outlines/{outline_id}``)
+    so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(method, route_label).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route_label, str(status_code[0])).inc()
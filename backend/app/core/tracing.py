@@ -0,0 +1,252 @@
+"""Request-scoped timing spans and the Server-Timing header
+
+``TimingMiddleware`` starts a ``RequestTrace`` for every HTTP request and
+keeps it in a context variable. Code marks phases with ``span("db")`` or
+the ``@traced("service")`` decorator; when no trace is active (the
+middleware is disabled) both reduce to a context variable lookup. Time per
+phase is summed into a ``Server-Timing`` response header, and a sample of
+requests can be written as full traces to a JSON-lines file.
+"""
+import functools
+import inspect
+import json
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+
+class RequestTrace:
+    """Spans recorded while serving one request"""
+
+    __slots__ = ("start", "totals", "depth", "spans", "handler_end")
+
+    def __init__(self, keep_spans: bool = False):
+        self.start = time.perf_counter()
+        # Phase name -> [total seconds, count], counting only the outermost
+        # span when a phase nests inside itself
+        self.totals: Dict[str, List[float]] = {}
+        self.depth: Dict[str, int] = {}
+        self.spans: Optional[List[Dict[str, Any]]] = [] if keep_spans else None
+        self.handler_end: Optional[float] = None
+
+    def add(self, name: str, start: float, end: float, detail: Optional[str] = None) -> None:
+        """Record a finished span"""
+        if not self.depth.get(name):
+            total = self.totals.setdefault(name, [0.0, 0])
+            total[0] += end - start
+            total[1] += 1
+        if self.spans is not None:
+            self.spans.append({
+                "name": name,
+                "detail": detail,
+                "start": round((start - self.start) * 1000, 3),
+                "dur": round((end - start) * 1000, 3),
+            })
+
+    def server_timing(self, now: float) -> str:
+        """Format phase totals as a Server-Timing header value"""
+        entries = [
+            f'{name};dur={total * 1000:.1f};desc="{count}x"' if count > 1 else f"{name};dur={total * 1000:.1f}"
+            for name, (total, count) in self.totals.items()
+        ]
+        entries.append(f"total;dur={(now - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class _Span:
+    """Context manager (sync or async) timing one phase"""
+
+    __slots__ = ("trace", "name", "detail", "start")
+
+    def __init__(self, trace: RequestTrace, name: str, detail: Optional[str]):
+        self.trace = trace
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        depth = self.trace.depth
+        depth[self.name] = depth.get(self.name, 0) + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self.trace.depth[self.name] -= 1
+        self.trace.add(self.name, self.start, end, self.detail)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info):
+        return self.__exit__(*exc_info)
+
+
+class _NoopSpan:
+    """Shared stand-in used when no request is being traced"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace of the request being served, if any"""
+    return _current_trace.get()
+
+
+def span(name: str, detail: Optional[str] = None):
+    """Time a block as phase ``name`` of the current request"""
+    trace = _current_trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, detail)
+
+
+def traced(name: str):
+    """Decorator timing every call of a function as phase ``name``"""
+    def decorator(func):
+        detail = func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return await func(*args, **kwargs)
+                with _Span(trace, name, detail):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Span(trace, name, detail):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _mark_handler_end(call):
+    """Wrap an endpoint so the trace knows when response rendering starts"""
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                trace = _current_trace.get()
+                if trace is not None:
+                    trace.handler_end = time.perf_counter()
+        return async_endpoint
+
+    @functools.wraps(call)
+    def endpoint(*args, **kwargs):
+        try:
+            return call(*args, **kwargs)
+        finally:
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.handler_end = time.perf_counter()
+    return endpoint
+
+
+def instrument_routes(app) -> None:
+    """Time response rendering (serialization) for every API route
+
+    Must run after all routes are registered.
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "_marks_handler_end", False):
+            route.dependant.call = _mark_handler_end(route.dependant.call)
+            route.dependant.call._marks_handler_end = True
+
+
+class TraceWriter:
+    """Append sampled traces to a JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record) + "\n"
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(line)
+        except OSError as e:
+            logger.warning(f"Could not write trace to {self.path}: {e}")
+
+
+class TimingMiddleware:
+    """ASGI middleware that traces requests
+
+    With ``server_timing`` the phase totals are sent in a ``Server-Timing``
+    header; with ``sample_rate`` > 0 that fraction of requests is written to
+    ``trace_file`` with every span.
+    """
+
+    def __init__(self, app, server_timing: bool = True, sample_rate: float = 0.0, trace_file: Optional[str] = None):
+        self.app = app
+        self.server_timing = server_timing
+        self.sample_rate = sample_rate
+        self.writer = TraceWriter(trace_file) if sample_rate > 0 and trace_file else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sampled = self.writer is not None and random.random() < self.sample_rate
+        trace = RequestTrace(keep_spans=sampled)
+        token = _current_trace.set(trace)
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                status_code[0] = message["status"]
+                if trace.handler_end is not None:
+                    trace.add("render", trace.handler_end, now)
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", trace.server_timing(now))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            if sampled:
+                route = scope.get("route")
+                self.writer.write({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(route, "path", None),
+                    "status": status_code[0],
+                    "durationMs": round((time.perf_counter() - trace.start) * 1000, 3),
+                    "spans": trace.spans,
+                })
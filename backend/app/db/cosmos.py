@@ -1,13 +1,60 @@
 """Azure Cosmos DB client and connection management"""
+import time
+from contextlib import asynccontextmanager
 from typing import Optional, Dict, Any, List
 from azure.cosmos.aio import CosmosClient
 from azure.cosmos import exceptions
 import logging
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import span
 
 logger = logging.getLogger(__name__)
 
+COSMOS_REQUEST_DURATION = metrics.histogram(
+    "cosmos_request_duration_seconds", "Cosmos DB operation latency", ("operation", "status")
+)
+COSMOS_REQUEST_CHARGE = metrics.counter(
+    "cosmos_request_charge_total", "Request units consumed by Cosmos DB operations", ("operation",)
+)
+COSMOS_THROTTLED = metrics.counter(
+    "cosmos_throttled_total", "Cosmos DB responses throttled with 429, including SDK retries", ("operation",)
+)
+
+
+@asynccontextmanager
+async def track_operation(operation: str):
+    """Record latency, RU charge and throttling for one Cosmos DB operation
+
+    Yields a ``response_hook`` for the SDK call, which reads the charge
+    (``x-ms-request-charge``) and SDK throttle retries from each response.
+    """
+    def response_hook(headers, *_):
+        charge = headers.get("x-ms-request-charge")
+        if charge:
+            COSMOS_REQUEST_CHARGE.labels(operation).inc(float(charge))
+        retries = headers.get("x-ms-throttle-retry-count")
+        if retries and retries != "0":
+            COSMOS_THROTTLED.labels(operation).inc(int(retries))
+
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with span("db", operation):
+            yield response_hook
+    except exceptions.CosmosHttpResponseError as e:
+        status = str(e.status_code)
+        if e.status_code == 429:
+            COSMOS_THROTTLED.labels(operation).inc()
+        if e.headers:
+            charge = e.headers.get("x-ms-request-charge")
+            if charge:
+                COSMOS_REQUEST_CHARGE.labels(operation).inc(float(charge))
+        raise
+    finally:
+        COSMOS_REQUEST_DURATION.labels(operation, status).observe(time.perf_counter() - start)
+
 
 class CosmosDBClient:
     """Async Cosmos DB client wrapper"""
@@ -17,6 +64,7 @@ class CosmosDBClient:
         self.database = None
         self.users_container = None
         self.docs_container = None
+        self.history_container = None
     
     async def initialize(self):
         """Initialize Cosmos DB connection and containers"""
@@ -47,6 +95,13 @@ class CosmosDBClient:
                 offer_throughput=400
             )
             
+            # Create or get History container with /outlineId as partition key
+            self.history_container = await self.database.create_container_if_not_exists(
+                id=settings.COSMOS_HISTORY_CONTAINER,
+                partition_key={"paths": ["/outlineId"], "kind": "Hash"},
+                offer_throughput=400
+            )
+            
             logger.info("Cosmos DB initialized successfully")
             
         except Exception as e:
@@ -73,17 +128,20 @@ class CosmosDBClient:
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user document"""
         try:
-            return await self.users_container.create_item(body=user_data)
+            async with track_operation("create_user") as hook:
+                return await self.users_container.create_item(body=user_data, response_hook=hook)
         except exceptions.CosmosResourceExistsError:
             raise ValueError("User already exists")
     
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a user by ID"""
         try:
-            return await self.users_container.read_item(
-                item=user_id,
-                partition_key=user_id
-            )
+            async with track_operation("get_user") as hook:
+                return await self.users_container.read_item(
+                    item=user_id,
+                    partition_key=user_id,
+                    response_hook=hook
+                )
         except exceptions.CosmosResourceNotFoundError:
             return None
     
@@ -92,34 +150,41 @@ class CosmosDBClient:
         query = "SELECT * FROM c WHERE c.email = @email"
         parameters = [{"name": "@email", "value": email}]
         
-        items = self.users_container.query_items(
-            query=query,
-            parameters=parameters
-        )
-        
-        async for item in items:
-            return item
+        async with track_operation("get_user_by_email") as hook:
+            items = self.users_container.query_items(
+                query=query,
+                parameters=parameters,
+                response_hook=hook
+            )
+            
+            async for item in items:
+                return item
         return None
     
     async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a user document"""
-        return await self.users_container.replace_item(
-            item=user_id,
-            body=user_data
-        )
+        async with track_operation("update_user") as hook:
+            return await self.users_container.replace_item(
+                item=user_id,
+                body=user_data,
+                response_hook=hook
+            )
     
     # Document (Outline) operations
     async def create_document(self, doc_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new document"""
-        return await self.docs_container.create_item(body=doc_data)
+        async with track_operation("create_document") as hook:
+            return await self.docs_container.create_item(body=doc_data, response_hook=hook)
     
     async def get_document(self, doc_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a document by ID"""
         try:
-            return await self.docs_container.read_item(
-                item=doc_id,
-                partition_key=user_id
-            )
+            async with track_operation("get_document") as hook:
+                return await self.docs_container.read_item(
+                    item=doc_id,
+                    partition_key=user_id,
+                    response_hook=hook
+                )
         except exceptions.CosmosResourceNotFoundError:
             return None
     
@@ -128,30 +193,102 @@ class CosmosDBClient:
         query = "SELECT * FROM c WHERE c.userId = @userId ORDER BY c.updatedAt DESC"
         parameters = [{"name": "@userId", "value": user_id}]
         
-        items = self.docs_container.query_items(
-            query=query,
-            parameters=parameters,
-            partition_key=user_id
-        )
-        
         documents = []
-        async for item in items:
-            documents.append(item)
+        async with track_operation("get_user_documents") as hook:
+            items = self.docs_container.query_items(
+                query=query,
+                parameters=parameters,
+                partition_key=user_id,
+                response_hook=hook
+            )
+            
+            async for item in items:
+                documents.append(item)
         return documents
     
     async def update_document(self, doc_id: str, doc_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a document"""
-        return await self.docs_container.replace_item(
-            item=doc_id,
-            body=doc_data
-        )
+        async with track_operation("update_document") as hook:
+            return await self.docs_container.replace_item(
+                item=doc_id,
+                body=doc_data,
+                response_hook=hook
+            )
     
     async def delete_document(self, doc_id: str, user_id: str):
         """Delete a document"""
-        await self.docs_container.delete_item(
-            item=doc_id,
-            partition_key=user_id
+        async with track_operation("delete_document") as hook:
+            await self.docs_container.delete_item(
+                item=doc_id,
+                partition_key=user_id,
+                response_hook=hook
+            )
+    
+    # Outline history operations
+    async def append_history(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an outline history entry, replacing any left by a failed save"""
+        body = {**entry, "id": f"entry-{entry['seq']}", "type": "entry"}
+        async with track_operation("append_history") as hook:
+            return await self.history_container.upsert_item(body=body, response_hook=hook)
+    
+    async def _query_history(self, operation: str, outline_id: str, query: str, parameters: List[Dict[str, Any]]):
+        results = []
+        async with track_operation(operation) as hook:
+            items = self.history_container.query_items(
+                query=query,
+                parameters=[{"name": "@outlineId", "value": outline_id}] + parameters,
+                partition_key=outline_id,
+                response_hook=hook
+            )
+            async for item in items:
+                results.append(item)
+        return results
+    
+    async def get_history(self, outline_id: str, first_seq: int, last_seq: int) -> List[Dict[str, Any]]:
+        """Get history entries with first_seq <= seq <= last_seq in order"""
+        return await self._query_history(
+            "get_history",
+            outline_id,
+            "SELECT * FROM c WHERE c.outlineId = @outlineId AND c.type = 'entry' "
+            "AND c.seq >= @first AND c.seq <= @last ORDER BY c.seq",
+            [{"name": "@first", "value": first_seq}, {"name": "@last", "value": last_seq}]
         )
+    
+    async def save_snapshot(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a full outline snapshot taken after entry ``seq``"""
+        body = {**snapshot, "id": f"snapshot-{snapshot['seq']}", "type": "snapshot"}
+        async with track_operation("save_snapshot") as hook:
+            return await self.history_container.upsert_item(body=body, response_hook=hook)
+    
+    async def get_snapshot(self, outline_id: str, max_seq: int) -> Optional[Dict[str, Any]]:
+        """Get the latest snapshot at or before max_seq"""
+        snapshots = await self._query_history(
+            "get_snapshot",
+            outline_id,
+            "SELECT TOP 1 * FROM c WHERE c.outlineId = @outlineId AND c.type = 'snapshot' "
+            "AND c.seq <= @max ORDER BY c.seq DESC",
+            [{"name": "@max", "value": max_seq}]
+        )
+        return snapshots[0] if snapshots else None
+    
+    async def delete_history(self, outline_id: str, through_seq: Optional[int] = None):
+        """Delete entries up to through_seq and older snapshots (everything if None)"""
+        if through_seq is None:
+            query = "SELECT c.id FROM c WHERE c.outlineId = @outlineId"
+            parameters = []
+        else:
+            query = (
+                "SELECT c.id FROM c WHERE c.outlineId = @outlineId AND "
+                "((c.type = 'entry' AND c.seq <= @seq) OR (c.type = 'snapshot' AND c.seq < @seq))"
+            )
+            parameters = [{"name": "@seq", "value": through_seq}]
+        for doc in await self._query_history("delete_history", outline_id, query, parameters):
+            async with track_operation("delete_history") as hook:
+                await self.history_container.delete_item(
+                    item=doc["id"],
+                    partition_key=outline_id,
+                    response_hook=hook
+                )
 
 
 # Global client instance
@@ -6,12 +6,15 @@ import json
 import os
 from pathlib import Path
 
+from app.core.tracing import traced
+
 class MockCosmosDBClient:
     """Mock Cosmos DB client for testing with file persistence"""
     
     def __init__(self):
         self.users = {}  # Store users by ID
         self.documents = {}  # Store documents by ID
+        self.history = {}  # Outline history entries and snapshots by outline ID
         self.is_initialized = False
         # Use a persistent file for mock data
         self.data_file = Path("mock_db_data.json")
@@ -25,10 +28,12 @@ class MockCosmosDBClient:
                     data = json.load(f)
                     self.users = data.get('users', {})
                     self.documents = data.get('documents', {})
+                    self.history = data.get('history', {})
             except (json.JSONDecodeError, IOError):
                 # If file is corrupted, start fresh
                 self.users = {}
                 self.documents = {}
+                self.history = {}
     
     def _save_data(self):
         """Save data to file"""
@@ -36,7 +41,8 @@ class MockCosmosDBClient:
             with open(self.data_file, 'w') as f:
                 json.dump({
                     'users': self.users,
-                    'documents': self.documents
+                    'documents': self.documents,
+                    'history': self.history
                 }, f, indent=2)
         except IOError:
             pass  # Silently fail if we can't write
@@ -58,6 +64,7 @@ class MockCosmosDBClient:
         }
     
     # User operations
+    @traced("db")
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user document"""
         # Check if email already exists
@@ -76,10 +83,12 @@ class MockCosmosDBClient:
         self._save_data()  # Persist to file
         return user_data
     
+    @traced("db")
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a user by ID"""
         return self.users.get(user_id)
     
+    @traced("db")
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Get a user by email"""
         for user in self.users.values():
@@ -87,6 +96,7 @@ class MockCosmosDBClient:
                 return user
         return None
     
+    @traced("db")
     async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a user document"""
         if user_id not in self.users:
@@ -98,6 +108,7 @@ class MockCosmosDBClient:
         return user_data
     
     # Document (Outline) operations
+    @traced("db")
     async def create_document(self, doc_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new document"""
         if "id" not in doc_data:
@@ -112,6 +123,7 @@ class MockCosmosDBClient:
         self._save_data()  # Persist to file
         return doc_data
     
+    @traced("db")
     async def get_document(self, doc_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a document by ID"""
         doc = self.documents.get(doc_id)
@@ -119,6 +131,7 @@ class MockCosmosDBClient:
             return doc
         return None
     
+    @traced("db")
     async def get_user_documents(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all documents for a user"""
         user_docs = [
@@ -129,6 +142,7 @@ class MockCosmosDBClient:
         user_docs.sort(key=lambda x: x.get("updatedAt", ""), reverse=True)
         return user_docs
     
+    @traced("db")
     async def update_document(self, doc_id: str, doc_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a document"""
         if doc_id not in self.documents:
@@ -139,6 +153,7 @@ class MockCosmosDBClient:
         self._save_data()  # Persist to file
         return doc_data
     
+    @traced("db")
     async def delete_document(self, doc_id: str, user_id: str) -> bool:
         """Delete a document"""
         doc = self.documents.get(doc_id)
@@ -147,6 +162,54 @@ class MockCosmosDBClient:
             self._save_data()  # Persist to file
             return True
         return False
+    
+    # Outline history operations
+    def _history(self, outline_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        return self.history.setdefault(outline_id, {"entries": [], "snapshots": []})
+    
+    @traced("db")
+    async def append_history(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an outline history entry, replacing any left by a failed save"""
+        entries = self._history(entry["outlineId"])["entries"]
+        if entries and entries[-1]["seq"] >= entry["seq"]:
+            entries[:] = [e for e in entries if e["seq"] < entry["seq"]]
+        entries.append(entry)
+        self._save_data()  # Persist to file
+        return entry
+    
+    @traced("db")
+    async def get_history(self, outline_id: str, first_seq: int, last_seq: int) -> List[Dict[str, Any]]:
+        """Get history entries with first_seq <= seq <= last_seq in order"""
+        entries = self.history.get(outline_id, {}).get("entries", [])
+        return [e for e in entries if first_seq <= e["seq"] <= last_seq]
+    
+    @traced("db")
+    async def save_snapshot(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a full outline snapshot taken after entry ``seq``"""
+        snapshots = self._history(snapshot["outlineId"])["snapshots"]
+        snapshots[:] = [s for s in snapshots if s["seq"] != snapshot["seq"]]
+        snapshots.append(snapshot)
+        snapshots.sort(key=lambda s: s["seq"])
+        self._save_data()  # Persist to file
+        return snapshot
+    
+    @traced("db")
+    async def get_snapshot(self, outline_id: str, max_seq: int) -> Optional[Dict[str, Any]]:
+        """Get the latest snapshot at or before max_seq"""
+        snapshots = self.history.get(outline_id, {}).get("snapshots", [])
+        candidates = [s for s in snapshots if s["seq"] <= max_seq]
+        return candidates[-1] if candidates else None
+    
+    @traced("db")
+    async def delete_history(self, outline_id: str, through_seq: Optional[int] = None):
+        """Delete entries up to through_seq and older snapshots (everything if None)"""
+        if through_seq is None:
+            self.history.pop(outline_id, None)
+        elif outline_id in self.history:
+            history = self.history[outline_id]
+            history["entries"] = [e for e in history["entries"] if e["seq"] > through_seq]
+            history["snapshots"] = [s for s in history["snapshots"] if s["seq"] >= through_seq]
+        self._save_data()  # Persist to file
 
 
 # Create a singleton instance
@@ -1,20 +1,25 @@
 """Main FastAPI application module"""
-import sys
-import traceback
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 
-# Add startup logging
-print("🚀 Starting BrainFlowy Backend...", file=sys.stderr)
+logger = logging.getLogger(__name__)
 
 try:
-    from app.api.router import api_router
     from app.core.config import settings
-    print("✅ Imports successful", file=sys.stderr)
-except Exception as e:
-    print(f"❌ Import error: {e}", file=sys.stderr)
-    traceback.print_exc()
+    from app.core.logging_config import configure_logging
+    configure_logging(settings)
+    logger.info("Starting BrainFlowy Backend")
+
+    from app.api.router import api_router
+    from app.services.search_service import search_service
+    from app.core.metrics import metrics, MetricsMiddleware, CONTENT_TYPE
+    from app.core.tracing import TimingMiddleware, instrument_routes
+    logger.info("Imports successful")
+except Exception:
+    logger.exception("Import error")
     raise
 
 # Use mock client in test mode
@@ -28,15 +33,16 @@ else:
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
-    print("📦 Initializing database...", file=sys.stderr)
+    logger.info("Initializing database")
     try:
         await cosmos_client.initialize()
-        print("✅ Database initialized", file=sys.stderr)
+        logger.info("Database initialized")
     except Exception as e:
-        print(f"⚠️ Database initialization failed (non-fatal): {e}", file=sys.stderr)
+        logger.warning(f"Database initialization failed (non-fatal): {e}")
         # Don't fail startup if database isn't available
     yield
     # Shutdown
+    search_service.flush()
     try:
         await cosmos_client.close()
     except:
@@ -59,6 +65,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Trace request phases into a Server-Timing header and sampled trace file
+tracing_enabled = settings.SERVER_TIMING_ENABLED or settings.TRACE_SAMPLE_RATE > 0
+if tracing_enabled:
+    app.add_middleware(
+        TimingMiddleware,
+        server_timing=settings.SERVER_TIMING_ENABLED,
+        sample_rate=settings.TRACE_SAMPLE_RATE,
+        trace_file=settings.TRACE_FILE
+    )
+
+# Record per-route latency and in-flight requests
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -95,4 +115,15 @@ async def health_check():
 @app.get("/ping")
 async def ping():
     """Simple ping endpoint for basic connectivity test"""
-    return {"status": "pong", "service": "brainflowy-backend"}
\ No newline at end of file
+    return {"status": "pong", "service": "brainflowy-backend"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
+# Time response rendering once every route is registered
+if tracing_enabled:
+    instrument_routes(app)
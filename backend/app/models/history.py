@@ -0,0 +1,35 @@
+"""Outline history models and schemas"""
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class HistoryEntry(BaseModel):
+    """Summary of one recorded change"""
+    seq: int
+    kind: str  # 'edit', 'undo', 'redo' or 'restore'
+    action: str  # What caused the change, e.g. 'delete_item'
+    target: Optional[int] = None  # Entry undone, redone or restored to
+    userId: Optional[str] = None
+    changeCount: int
+    createdAt: str
+
+
+class HistoryState(BaseModel):
+    """Position in an outline's history"""
+    seq: int
+    canUndo: bool
+    canRedo: bool
+    entry: Optional[HistoryEntry] = None  # Entry recorded by the request
+
+
+class HistoryList(BaseModel):
+    """Recent entries, newest first"""
+    seq: int
+    canUndo: bool
+    canRedo: bool
+    entries: List[HistoryEntry]
+
+
+class RestoreRequest(BaseModel):
+    """Restore the outline as it was after entry ``seq``"""
+    seq: int = Field(..., ge=0)
@@ -12,7 +12,10 @@ class OutlineItem(BaseModel):
     parentId: Optional[str] = None
     outlineId: str
     order: int = 0
+    rank: Optional[str] = None  # Fractional sort key among siblings
     children: List['OutlineItem'] = []
+    hasChildren: Optional[bool] = None  # Set on nodes truncated by a depth-limited fetch
+    childCount: Optional[int] = None
     style: Optional[str] = None  # 'header', 'code', 'quote', 'normal'
     formatting: Optional[Dict[str, Any]] = None  # {'bold': true, 'italic': true, 'size': 'large'}
     createdAt: datetime = Field(default_factory=datetime.utcnow)
@@ -72,7 +75,7 @@ class OperationType(str, Enum):
 class BatchOperation(BaseModel):
     """Single operation in a batch"""
     type: OperationType
-    id: Optional[str] = None  # Not needed for CREATE
+    id: Optional[str] = None  # For CREATE, an optional client reference usable by later ops
     data: Optional[Dict[str, Any]] = None  # For CREATE and UPDATE
     parentId: Optional[str] = None  # For CREATE and MOVE
     position: Optional[int] = None  # For CREATE and MOVE
@@ -81,6 +84,17 @@ class BatchOperation(BaseModel):
 class BatchOperationRequest(BaseModel):
     """Request for batch operations"""
     operations: List[BatchOperation]
+    atomic: bool = False  # Apply all operations or none of them
+
+
+class BatchOperationResult(BaseModel):
+    """Outcome of a single operation in a batch"""
+    index: int
+    type: OperationType
+    id: Optional[str] = None  # Server item ID
+    ref: Optional[str] = None  # Client reference given on CREATE
+    success: bool
+    error: Optional[str] = None
 
 
 class BatchOperationResponse(BaseModel):
@@ -88,6 +102,7 @@ class BatchOperationResponse(BaseModel):
     success: bool
     items: List[OutlineItem]
     errors: List[str] = []
+    results: List[BatchOperationResult] = []
 
 
 class TemplateRequest(BaseModel):
@@ -96,5 +111,19 @@ class TemplateRequest(BaseModel):
     clearExisting: bool = False  # Whether to clear existing items first
 
 
+class ImportStatus(BaseModel):
+    """Progress of a streaming import"""
+    importId: str
+    status: str  # 'running', 'completed' or 'failed'
+    format: str
+    filename: Optional[str] = None
+    parentId: Optional[str] = None
+    processed: int = 0  # Entries parsed and written so far
+    batches: int = 0
+    error: Optional[str] = None
+    startedAt: datetime
+    updatedAt: datetime
+
+
 # Allow forward references
 OutlineItem.model_rebuild()
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""Search models and schemas"""
+from typing import List
+from pydantic import BaseModel
+
+
+class Breadcrumb(BaseModel):
+    """Ancestor of a search hit"""
+    id: str
+    content: str
+
+
+class SearchResult(BaseModel):
+    """Single item matching a search query"""
+    outlineId: str
+    outlineTitle: str
+    itemId: str
+    content: str
+    score: float
+    breadcrumbs: List[Breadcrumb] = []
+
+
+class SearchResponse(BaseModel):
+    """Search results for a query"""
+    query: str
+    results: List[SearchResult]
@@ -8,6 +8,7 @@ from anthropic import Anthropic
 
 from app.models.voice import StructuredItem
 from app.core.config import settings
+from app.core.metrics import track_ai_call
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +24,7 @@ class AIVoiceService:
         # Initialize OpenAI client if API key is available
         if settings.OPENAI_API_KEY:
             try:
-                self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+                self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
                 logger.info("OpenAI client initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI client: {e}")
@@ -65,11 +66,12 @@ class AIVoiceService:
                 with open(tmp_file_path, "rb") as audio_file:
                     logger.info(f"Sending audio to Whisper API (size: {len(audio_data)} bytes)")
                     
-                    transcript = self.openai_client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        response_format="text"
-                    )
+                    with track_ai_call("openai", "transcribe"):
+                        transcript = self.openai_client.audio.transcriptions.create(
+                            model="whisper-1",
+                            file=audio_file,
+                            response_format="text"
+                        )
                     
                     logger.info(f"Transcription successful: {transcript[:100]}...")
                     return transcript
@@ -123,14 +125,15 @@ class AIVoiceService:
             
             Return only the JSON array, no other text."""
             
-            message = self.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20241022",  # Updated model name
-                max_tokens=1000,
-                temperature=0.3,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            with track_ai_call("anthropic", "structure"):
+                message = self.anthropic_client.messages.create(
+                    model="claude-3-5-sonnet-20241022",  # Updated model name
+                    max_tokens=1000,
+                    temperature=0.3,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
             
             # Parse Claude's response
             import json
@@ -170,14 +173,15 @@ class AIVoiceService:
             
             Return only the JSON array, no other text."""
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",  # Using stable, cost-effective model
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that structures text into hierarchical outlines."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
+            with track_ai_call("openai", "structure"):
+                response = self.openai_client.chat.completions.create(
+                    model="gpt-4o-mini",  # Using stable, cost-effective model
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that structures text into hierarchical outlines."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3
+                )
             
             # Parse GPT's response
             import json
@@ -0,0 +1,175 @@
+"""Batch operation executor for outline items"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.ids import new_id
+from app.core.tracing import traced
+from app.models.outline import BatchOperation, BatchOperationResult, OperationType
+from app.services.outline_service import OutlineService, outline_service as default_outline_service
+
+
+class BatchError(Exception):
+    """Raised when a single batch operation cannot be applied"""
+
+
+class BatchExecutor:
+    """Apply CREATE/UPDATE/MOVE/DELETE operations against one item index
+
+    The outline's items are indexed once by id and by parent, so every
+    operation costs O(1) lookups plus the size of the sibling group or
+    subtree it touches. Items are copied on first write; the original list
+    is never mutated, which lets atomic batches be discarded untouched.
+    """
+
+    def __init__(
+        self,
+        items: List[Dict[str, Any]],
+        outline_id: str,
+        outline_service: Optional[OutlineService] = None
+    ):
+        self.outline_id = outline_id
+        self.outline_service = outline_service or default_outline_service
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[Optional[str], Set[str]] = {}
+        for item in items:
+            self.index[item["id"]] = item
+            self.children.setdefault(item.get("parentId"), set()).add(item["id"])
+        self.copied: Set[str] = set()
+        self.created: Set[str] = set()
+        self.deleted: Set[str] = set()
+        # Client-supplied CREATE ids, mapped to the generated server ids
+        self.refs: Dict[str, str] = {}
+
+    @traced("service")
+    def execute(self, operations: List[BatchOperation]) -> List[BatchOperationResult]:
+        """Apply operations in order and report the outcome of each"""
+        results = []
+        for position, op in enumerate(operations):
+            try:
+                item_id = self._apply(op)
+                results.append(BatchOperationResult(
+                    index=position, type=op.type, id=item_id, ref=op.id, success=True
+                ))
+            except BatchError as e:
+                results.append(BatchOperationResult(
+                    index=position, type=op.type, id=op.id, success=False, error=str(e)
+                ))
+        return results
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        """The resulting flat item list, in original storage order"""
+        return list(self.index.values())
+
+    def changed_ids(self) -> Set[str]:
+        """Ids of items created, modified or deleted by the batch"""
+        return self.created | self.copied | self.deleted
+
+    # Operation handlers
+    def _apply(self, op: BatchOperation) -> Optional[str]:
+        if op.type == OperationType.CREATE:
+            return self._create(op)
+        item_id = self._resolve(op.id)
+        if item_id not in self.index:
+            raise BatchError(f"Item not found: {op.id}")
+        if op.type == OperationType.UPDATE:
+            self._update(item_id, op)
+        elif op.type == OperationType.MOVE:
+            self._move(item_id, op.parentId, op.position)
+        elif op.type == OperationType.DELETE:
+            self._delete(item_id)
+        return item_id
+
+    def _create(self, op: BatchOperation) -> str:
+        data = op.data or {}
+        parent_id = self._resolve(op.parentId)
+        self._check_parent(parent_id)
+
+        # Generate ID server-side
+        item_id = new_id("item")
+        now = datetime.utcnow().isoformat()
+        new_item = {
+            "id": item_id,
+            "content": data.get("text", data.get("content", "")),
+            "parentId": parent_id,
+            "outlineId": self.outline_id,
+            "order": 0,
+            "style": data.get("style"),
+            "formatting": data.get("formatting"),
+            "createdAt": now,
+            "updatedAt": now
+        }
+        self._place(new_item, parent_id, op.position)
+        self.index[item_id] = new_item
+        self.created.add(item_id)
+        if op.id:
+            self.refs[op.id] = item_id
+        return item_id
+
+    def _update(self, item_id: str, op: BatchOperation) -> None:
+        item = self._writable(item_id)
+        if op.data:
+            if "text" in op.data or "content" in op.data:
+                item["content"] = op.data.get("text", op.data.get("content"))
+            if "style" in op.data:
+                item["style"] = op.data["style"]
+            if "formatting" in op.data:
+                item["formatting"] = op.data["formatting"]
+        if op.parentId is not None or op.position is not None:
+            parent_id = self._resolve(op.parentId) if op.parentId is not None else item.get("parentId")
+            self._move(item_id, parent_id, op.position)
+        item["updatedAt"] = datetime.utcnow().isoformat()
+
+    def _move(self, item_id: str, parent_id: Optional[str], position: Optional[int]) -> None:
+        parent_id = self._resolve(parent_id)
+        self._check_parent(parent_id)
+
+        # Walk up from the new parent; reaching the item means a cycle
+        ancestor_id = parent_id
+        while ancestor_id is not None:
+            if ancestor_id == item_id:
+                raise BatchError(f"Cannot move {item_id} into its own subtree")
+            ancestor_id = self.index[ancestor_id].get("parentId") if ancestor_id in self.index else None
+
+        item = self._writable(item_id)
+        self.children[item.get("parentId")].discard(item_id)
+        self._place(item, parent_id, position)
+        item["updatedAt"] = datetime.utcnow().isoformat()
+
+    def _delete(self, item_id: str) -> None:
+        # Remove the item and its descendants using the parent index
+        item = self.index[item_id]
+        self.children[item.get("parentId")].discard(item_id)
+        stack = [item_id]
+        while stack:
+            current = stack.pop()
+            stack.extend(self.children.pop(current, ()))
+            del self.index[current]
+            self.deleted.add(current)
+            self.created.discard(current)
+            self.copied.discard(current)
+
+    # Helpers
+    def _resolve(self, item_id: Optional[str]) -> Optional[str]:
+        return self.refs.get(item_id, item_id) if item_id is not None else None
+
+    def _check_parent(self, parent_id: Optional[str]) -> None:
+        if parent_id is not None and parent_id not in self.index:
+            raise BatchError(f"Parent not found: {parent_id}")
+
+    def _writable(self, item_id: str) -> Dict[str, Any]:
+        """Copy an item on its first write so the source list stays intact"""
+        if item_id not in self.copied and item_id not in self.created:
+            self.index[item_id] = dict(self.index[item_id])
+            self.copied.add(item_id)
+        return self.index[item_id]
+
+    def _place(self, item: Dict[str, Any], parent_id: Optional[str], position: Optional[int]) -> None:
+        group = self.children.setdefault(parent_id, set())
+        siblings = [self.index[sibling_id] for sibling_id in group]
+        # Siblings are only copied if the group has to be respread
+        self.outline_service.place_item(
+            siblings, item, parent_id, position,
+            writable=lambda sibling: self._writable(sibling["id"])
+        )
+        group.add(item["id"])
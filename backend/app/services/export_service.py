@@ -0,0 +1,128 @@
+"""Streaming export of outlines to Markdown, OPML and JSON
+
+Exports are generators that walk the outline depth-first and yield encoded
+chunks, so a response never holds more than one chunk of output no matter
+how large the outline is.
+"""
+import json
+import re
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List
+from xml.sax.saxutils import escape, quoteattr
+
+from app.services.outline_service import OutlineService, outline_service as default_outline_service
+
+# Output is buffered into chunks of roughly this many characters
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    "md": ("text/markdown; charset=utf-8", "md"),
+    "opml": ("text/x-opml; charset=utf-8", "opml"),
+    "json": ("application/json", "json"),
+}
+
+# Item fields written to JSON exports, besides children
+JSON_FIELDS = ("id", "content", "rank", "style", "formatting", "createdAt", "updatedAt")
+
+
+class OutlineExporter:
+    """Render one outline document as a stream of chunks"""
+
+    def __init__(self, outline: Dict[str, Any], outline_service: OutlineService = None):
+        self.outline = outline
+        self.outline_service = outline_service or default_outline_service
+
+    def stream(self, export_format: str, compress: bool = False) -> Iterator[bytes]:
+        """Encoded chunks of the export, optionally gzip-compressed"""
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        render = getattr(self, f"_render_{export_format}")
+        chunks = _buffered(render())
+        return gzip_chunks(chunks) if compress else chunks
+
+    def filename(self, export_format: str) -> str:
+        """Download filename derived from the outline title"""
+        stem = re.sub(r"[^\w-]+", "-", self.outline.get("title") or "").strip("-") or "outline"
+        return f"{stem}.{EXPORT_FORMATS[export_format][1]}"
+
+    def _walk(self):
+        return self.outline_service.walk_tree(self.outline.get("items", []))
+
+    # Renderers yield text fragments in document order
+    def _render_md(self) -> Iterator[str]:
+        yield f"# {self.outline.get('title', '')}\n\n"
+        for item, level, entering in self._walk():
+            if not entering:
+                continue
+            indent = "  " * level
+            # Continuation lines of multi-line content stay inside the bullet
+            content = (item.get("content") or "").replace("\n", f"\n{indent}  ")
+            yield f"{indent}- {content}\n"
+
+    def _render_opml(self) -> Iterator[str]:
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n<opml version="2.0">\n'
+        yield f"  <head>\n    <title>{escape(self.outline.get('title', ''))}</title>\n  </head>\n  <body>\n"
+        # Elements are opened on entry and closed on exit; leaves self-close
+        # unless a child follows
+        pending = None
+        for item, level, entering in self._walk():
+            if entering:
+                if pending is not None:
+                    yield pending + ">\n"
+                attributes = f"text={quoteattr(item.get('content') or '')}"
+                if item.get("style"):
+                    attributes += f" _style={quoteattr(item['style'])}"
+                pending = f"{'  ' * (level + 2)}<outline {attributes}"
+            elif pending is not None:
+                yield pending + "/>\n"
+                pending = None
+            else:
+                yield f"{'  ' * (level + 2)}</outline>\n"
+        yield "  </body>\n</opml>\n"
+
+    def _render_json(self) -> Iterator[str]:
+        header = {
+            "id": self.outline.get("id"),
+            "title": self.outline.get("title"),
+            "createdAt": self.outline.get("createdAt"),
+            "updatedAt": self.outline.get("updatedAt"),
+        }
+        yield json.dumps(header)[:-1] + ', "items": ['
+        # Whether the innermost open list already has an element
+        has_elements: List[bool] = [False]
+        for item, _, entering in self._walk():
+            if entering:
+                node = {field: item[field] for field in JSON_FIELDS if item.get(field) is not None}
+                separator = ", " if has_elements[-1] else ""
+                has_elements[-1] = True
+                has_elements.append(False)
+                yield separator + json.dumps(node)[:-1] + ', "children": ['
+            else:
+                has_elements.pop()
+                yield "]}"
+        yield "]}\n"
+
+
+def _buffered(fragments: Iterable[str]) -> Iterator[bytes]:
+    """Join small text fragments into UTF-8 chunks of about CHUNK_SIZE"""
+    buffer: List[str] = []
+    size = 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a chunk stream into a single gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
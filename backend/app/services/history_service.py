@@ -0,0 +1,290 @@
+"""Per-outline operation log with snapshots
+
+Every mutation of an outline is recorded as one history entry holding
+only the items that changed: inserted and deleted items in full, updated
+items as the changed fields before and after. Entries are appended with an
+increasing ``seq`` and never rewritten, and each one can be inverted, so:
+
+- undo applies the inverse of the latest edit and appends it as an entry,
+- redo re-applies an undone edit and appends it as an entry,
+- the state after any ``seq`` is rebuilt from the nearest snapshot at or
+  before it plus the entries in between.
+
+A snapshot of the whole outline is stored at the first entry and every
+HISTORY_SNAPSHOT_INTERVAL entries. Entries older than the newest snapshot
+outside the last HISTORY_RETENTION entries are pruned, which bounds both
+storage and the number of entries replayed by a restore.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Use mock client in test mode
+if settings.TESTING:
+    from app.db.mock_cosmos import mock_cosmos_client as cosmos_client
+else:
+    from app.db.cosmos import cosmos_client
+
+logger = logging.getLogger(__name__)
+
+# Outline fields holding the history position and undo/redo stacks
+HISTORY_FIELDS = ("historySeq", "undoStack", "redoStack")
+
+
+class HistoryError(ValueError):
+    """Raised when an undo, redo or restore cannot be performed"""
+
+
+class ChangeTracker:
+    """State of an outline before a mutation, for diffing afterwards"""
+
+    def __init__(self, outline: Dict[str, Any]):
+        self.title = outline.get("title")
+        # Shallow copies: endpoints replace field values rather than mutate them
+        self.before = {item["id"]: dict(item) for item in outline.get("items", [])}
+
+    def changes(self, outline: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Compact, invertible description of what changed"""
+        changes: List[Dict[str, Any]] = []
+        if outline.get("title") != self.title:
+            changes.append({"op": "title", "before": self.title, "after": outline.get("title")})
+        seen = set()
+        for item in outline.get("items", []):
+            seen.add(item["id"])
+            old = self.before.get(item["id"])
+            if old is None:
+                changes.append({"op": "insert", "item": dict(item)})
+            elif old != item:
+                fields = [field for field in item.keys() | old.keys() if old.get(field) != item.get(field)]
+                changes.append({
+                    "op": "update",
+                    "id": item["id"],
+                    "before": {field: old.get(field) for field in fields},
+                    "after": {field: item.get(field) for field in fields},
+                })
+        for item_id, old in self.before.items():
+            if item_id not in seen:
+                changes.append({"op": "delete", "item": old})
+        return changes
+
+
+def invert(changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Changes that undo ``changes``"""
+    inverse = []
+    for change in reversed(changes):
+        op = change["op"]
+        if op == "insert":
+            inverse.append({"op": "delete", "item": change["item"]})
+        elif op == "delete":
+            inverse.append({"op": "insert", "item": change["item"]})
+        elif op == "update":
+            inverse.append({"op": "update", "id": change["id"], "before": change["after"], "after": change["before"]})
+        elif op == "title":
+            inverse.append({"op": "title", "before": change["after"], "after": change["before"]})
+    return inverse
+
+
+def apply_changes(items: List[Dict[str, Any]], title: Optional[str], changes: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Apply changes to an item list, returning the new items and title
+
+    Items are copied before being modified, so stored entries and
+    snapshots are never changed.
+    """
+    by_id = {item["id"]: item for item in items}
+    for change in changes:
+        op = change["op"]
+        if op == "insert":
+            by_id[change["item"]["id"]] = dict(change["item"])
+        elif op == "delete":
+            by_id.pop(change["item"]["id"], None)
+        elif op == "update":
+            item = by_id.get(change["id"])
+            if item is not None:
+                by_id[change["id"]] = {**item, **change["after"]}
+        elif op == "title":
+            title = change["after"]
+    return list(by_id.values()), title
+
+
+def summarize(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Entry fields for the API"""
+    return {
+        "seq": entry["seq"],
+        "kind": entry["kind"],
+        "action": entry["action"],
+        "target": entry.get("target"),
+        "userId": entry.get("userId"),
+        "changeCount": len(entry["changes"]),
+        "createdAt": entry["createdAt"],
+    }
+
+
+class OutlineHistory:
+    """Records outline changes and replays them for undo, redo and restore"""
+
+    def __init__(self, store=None, snapshot_interval: Optional[int] = None, retention: Optional[int] = None):
+        self.store = store or cosmos_client
+        self.snapshot_interval = snapshot_interval or settings.HISTORY_SNAPSHOT_INTERVAL
+        self.retention = retention or settings.HISTORY_RETENTION
+
+    def track(self, outline: Dict[str, Any]) -> ChangeTracker:
+        """Capture the outline before mutating it"""
+        return ChangeTracker(outline)
+
+    def position(self, outline: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "seq": outline.get("historySeq", 0),
+            "canUndo": bool(outline.get("undoStack")),
+            "canRedo": bool(outline.get("redoStack")),
+        }
+
+    async def record(
+        self,
+        outline: Dict[str, Any],
+        tracker: ChangeTracker,
+        action: str,
+        user_id: Optional[str] = None,
+        kind: str = "edit",
+        target: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Append the changes made since ``tracker`` was taken
+
+        Call before saving the outline: the history position is stored in
+        the outline document. Returns the entry, or None if nothing changed.
+        """
+        changes = tracker.changes(outline)
+        if not changes:
+            return None
+        outline_id = outline["id"]
+        seq = outline.get("historySeq", 0) + 1
+        if seq == 1:
+            # Base snapshot for replaying the first entries
+            await self.store.save_snapshot({
+                "outlineId": outline_id,
+                "seq": 0,
+                "title": tracker.title,
+                "items": list(tracker.before.values()),
+                "createdAt": datetime.utcnow().isoformat(),
+            })
+
+        entry = {
+            "outlineId": outline_id,
+            "seq": seq,
+            "kind": kind,
+            "action": action,
+            "target": target,
+            "userId": user_id,
+            "changes": changes,
+            "createdAt": datetime.utcnow().isoformat(),
+        }
+        # Written before the outline: a failed save leaves an entry that the
+        # next change overwrites, never an outline pointing at a missing entry
+        await self.store.append_history(entry)
+        outline["historySeq"] = seq
+        if kind in ("edit", "restore"):
+            outline["undoStack"] = (outline.get("undoStack") or [])[-(self.retention - 1):] + [seq]
+            outline["redoStack"] = []
+
+        if seq % self.snapshot_interval == 0:
+            await self.store.save_snapshot({
+                "outlineId": outline_id,
+                "seq": seq,
+                "title": outline.get("title"),
+                "items": [dict(item) for item in outline.get("items", [])],
+                "createdAt": entry["createdAt"],
+            })
+            await self._prune(outline, seq)
+        return entry
+
+    async def _prune(self, outline: Dict[str, Any], seq: int) -> None:
+        """Drop entries and snapshots no longer needed within the retention window"""
+        oldest_kept = seq - self.retention
+        if oldest_kept <= 0:
+            return
+        snapshot = await self.store.get_snapshot(outline["id"], oldest_kept)
+        if snapshot is None or snapshot["seq"] == 0:
+            return
+        # The snapshot replaces every entry up to and including its seq
+        await self.store.delete_history(outline["id"], snapshot["seq"])
+        for stack in ("undoStack", "redoStack"):
+            outline[stack] = [s for s in outline.get(stack) or [] if s > snapshot["seq"]]
+
+    async def _entry(self, outline_id: str, seq: int) -> Dict[str, Any]:
+        entries = await self.store.get_history(outline_id, seq, seq)
+        if not entries:
+            raise HistoryError(f"History entry {seq} is no longer available")
+        return entries[0]
+
+    async def undo(self, outline: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Revert the latest edit that has not been undone"""
+        undo_stack = outline.get("undoStack") or []
+        if not undo_stack:
+            raise HistoryError("Nothing to undo")
+        target = undo_stack[-1]
+        entry = await self._entry(outline["id"], target)
+
+        tracker = self.track(outline)
+        outline["items"], outline["title"] = apply_changes(outline.get("items", []), outline.get("title"), invert(entry["changes"]))
+        outline["undoStack"] = undo_stack[:-1]
+        outline["redoStack"] = (outline.get("redoStack") or []) + [target]
+        return await self._record_replay(outline, tracker, entry, "undo", user_id)
+
+    async def redo(self, outline: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Re-apply the most recently undone edit"""
+        redo_stack = outline.get("redoStack") or []
+        if not redo_stack:
+            raise HistoryError("Nothing to redo")
+        target = redo_stack[-1]
+        entry = await self._entry(outline["id"], target)
+
+        tracker = self.track(outline)
+        outline["items"], outline["title"] = apply_changes(outline.get("items", []), outline.get("title"), entry["changes"])
+        outline["redoStack"] = redo_stack[:-1]
+        outline["undoStack"] = (outline.get("undoStack") or []) + [target]
+        return await self._record_replay(outline, tracker, entry, "redo", user_id)
+
+    async def _record_replay(self, outline, tracker, entry, kind, user_id) -> Dict[str, Any]:
+        recorded = await self.record(outline, tracker, entry["action"], user_id, kind=kind, target=entry["seq"])
+        if recorded is None:
+            # The items already matched (e.g. the change was made again by hand)
+            recorded = {**entry, "kind": kind, "target": entry["seq"], "changes": []}
+        return recorded
+
+    async def state_at(self, outline: Dict[str, Any], seq: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Items and title as they were after entry ``seq``"""
+        if seq > outline.get("historySeq", 0):
+            raise HistoryError(f"History entry {seq} does not exist")
+        if seq == outline.get("historySeq", 0):
+            return [dict(item) for item in outline.get("items", [])], outline.get("title")
+        snapshot = await self.store.get_snapshot(outline["id"], seq)
+        if snapshot is None:
+            raise HistoryError(f"History entry {seq} is no longer available")
+        items, title = [dict(item) for item in snapshot["items"]], snapshot.get("title")
+        if snapshot["seq"] < seq:
+            for entry in await self.store.get_history(outline["id"], snapshot["seq"] + 1, seq):
+                items, title = apply_changes(items, title, entry["changes"])
+        return items, title
+
+    async def restore(self, outline: Dict[str, Any], seq: int, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Bring the outline back to its state after ``seq``; the restore can be undone"""
+        items, title = await self.state_at(outline, seq)
+        tracker = self.track(outline)
+        outline["items"], outline["title"] = items, title
+        outline["itemCount"] = len(items)
+        return await self.record(outline, tracker, "restore", user_id, kind="restore", target=seq)
+
+    async def entries(self, outline: Dict[str, Any], limit: int = 50) -> List[Dict[str, Any]]:
+        """The latest entries, newest first"""
+        seq = outline.get("historySeq", 0)
+        entries = await self.store.get_history(outline["id"], max(seq - limit + 1, 1), seq)
+        return [summarize(entry) for entry in reversed(entries)]
+
+    async def forget(self, outline_id: str) -> None:
+        """Delete the history of a deleted outline"""
+        await self.store.delete_history(outline_id)
+
+
+# Global service instance
+history_service = OutlineHistory()
@@ -0,0 +1,273 @@
+"""Incremental import of Markdown and OPML documents into an outline
+
+Parsers are fed the upload chunk by chunk and emit ``(level, content,
+style)`` entries as soon as each one is complete. ``OutlineImporter`` turns
+entries into items in the same pass: parents come from a stack of open
+ancestors and ranks from a per-parent counter, so nothing but the open
+branch of the document is kept in memory. Its ``state`` is a small
+checkpoint that is saved with every batch and lets an interrupted import
+resume.
+"""
+import codecs
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.ids import new_id
+from app.services.ordering import sequence_rank
+from app.services.outline_service import OutlineService, outline_service as default_outline_service
+
+# (level, content, style)
+Entry = Tuple[int, str, Optional[str]]
+
+IMPORT_FORMATS = ("md", "opml")
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BULLET_RE = re.compile(r"^(\s*)(?:[-*+]|\d+[.)])\s+(.*)$")
+_QUOTE_RE = re.compile(r"^\s*>\s?(.*)$")
+_RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_FENCE = "```"
+
+
+class ImportParseError(ValueError):
+    """Raised when an uploaded document cannot be parsed"""
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """Guess the import format from an upload's name or content type"""
+    name = (filename or "").lower()
+    if name.endswith((".opml", ".xml")) or "opml" in (content_type or "") or "xml" in (content_type or ""):
+        return "opml"
+    return "md"
+
+
+class MarkdownParser:
+    """Line-based Markdown parser for headings, lists, quotes and code
+
+    Headings nest by level, list items nest by indentation below the
+    current heading, and plain paragraphs become items at the heading's
+    child level. Indented lines continue the previous item.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._headings: List[int] = []  # Open heading levels (1-6)
+        self._indents: List[int] = []  # Open list indentation widths
+        self._pending: Optional[List[Any]] = None  # [level, lines, style]
+        self._fence: Optional[List[Any]] = None
+
+    def feed(self, data: bytes) -> List[Entry]:
+        """Consume a chunk and return the entries it completed"""
+        self._buffer += self._decoder.decode(data)
+        *lines, self._buffer = self._buffer.split("\n")
+        entries: List[Entry] = []
+        for line in lines:
+            self._line(line.rstrip("\r"), entries)
+        return entries
+
+    def close(self) -> List[Entry]:
+        """Flush the last line and any open item"""
+        entries: List[Entry] = []
+        self._buffer += self._decoder.decode(b"", final=True)
+        if self._buffer:
+            self._line(self._buffer.rstrip("\r"), entries)
+            self._buffer = ""
+        if self._fence is not None:
+            self._pending, self._fence = self._fence, None
+        self._flush(entries)
+        return entries
+
+    def _line(self, line: str, entries: List[Entry]) -> None:
+        base = len(self._headings)
+        if self._fence is not None:
+            if line.strip().startswith(_FENCE):
+                self._pending, self._fence = self._fence, None
+                self._flush(entries)
+            else:
+                self._fence[1].append(line)
+            return
+
+        if not line.strip():
+            self._flush(entries)
+            return
+        if line.lstrip().startswith(_FENCE):
+            self._flush(entries)
+            self._fence = [base + len(self._indents), [], "code"]
+            return
+        if _RULE_RE.match(line):
+            self._flush(entries)
+            return
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            self._flush(entries)
+            level = len(heading.group(1))
+            while self._headings and self._headings[-1] >= level:
+                self._headings.pop()
+            self._pending = [len(self._headings), [heading.group(2)], "header"]
+            self._headings.append(level)
+            self._indents = []
+            self._flush(entries)
+            return
+
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            self._flush(entries)
+            indent = len(bullet.group(1).expandtabs(4))
+            while self._indents and self._indents[-1] > indent:
+                self._indents.pop()
+            if not self._indents or self._indents[-1] < indent:
+                self._indents.append(indent)
+            self._pending = [base + len(self._indents) - 1, [bullet.group(2).strip()], None]
+            return
+
+        quote = _QUOTE_RE.match(line)
+        if quote:
+            if self._pending is not None and self._pending[2] == "quote":
+                self._pending[1].append(quote.group(1))
+                return
+            self._flush(entries)
+            self._pending = [base + len(self._indents), [quote.group(1)], "quote"]
+            return
+
+        # Indented text continues the open item; anything else is a paragraph
+        if self._pending is not None and (line[0].isspace() or not self._indents):
+            self._pending[1].append(line.strip())
+            return
+        self._flush(entries)
+        self._indents = []
+        self._pending = [base, [line.strip()], None]
+
+    def _flush(self, entries: List[Entry]) -> None:
+        if self._pending is not None:
+            level, lines, style = self._pending
+            entries.append((level, "\n".join(lines), style))
+            self._pending = None
+
+
+class OpmlParser:
+    """Pull parser for OPML ``outline`` elements
+
+    Finished elements are detached from their parent, so the element tree
+    never holds more than the open branch.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._open: List[ET.Element] = []
+        self._level = -1
+
+    def feed(self, data: bytes) -> List[Entry]:
+        """Consume a chunk and return the entries it completed"""
+        try:
+            self._parser.feed(data)
+        except ET.ParseError as e:
+            raise ImportParseError(f"Invalid OPML: {e}")
+        return self._read_events()
+
+    def close(self) -> List[Entry]:
+        """Finish parsing and return any remaining entries"""
+        try:
+            self._parser.close()
+        except ET.ParseError as e:
+            raise ImportParseError(f"Invalid OPML: {e}")
+        return self._read_events()
+
+    def _read_events(self) -> List[Entry]:
+        entries: List[Entry] = []
+        try:
+            for event, element in self._parser.read_events():
+                is_outline = element.tag == "outline"
+                if event == "start":
+                    self._open.append(element)
+                    if is_outline:
+                        self._level += 1
+                        entries.append((self._level, element.get("text", ""), element.get("_style")))
+                    continue
+                self._open.pop()
+                if is_outline:
+                    self._level -= 1
+                if self._open:
+                    self._open[-1].remove(element)
+        except ET.ParseError as e:
+            raise ImportParseError(f"Invalid OPML: {e}")
+        return entries
+
+
+def create_parser(import_format: str):
+    """Get a fresh incremental parser for a format"""
+    if import_format == "opml":
+        return OpmlParser()
+    if import_format == "md":
+        return MarkdownParser()
+    raise ValueError(f"Unsupported import format: {import_format}")
+
+
+class OutlineImporter:
+    """Turn parsed entries into outline items in a single pass
+
+    Items are appended after the existing children of ``parent_id``. The
+    importer only keeps the stack of open ancestors and one rank counter per
+    open parent; ``state`` captures both so a later request can continue
+    where an interrupted one stopped.
+    """
+
+    def __init__(
+        self,
+        outline: Dict[str, Any],
+        parent_id: Optional[str] = None,
+        state: Optional[Dict[str, Any]] = None,
+        outline_service: Optional[OutlineService] = None
+    ):
+        self.outline_id = outline["id"]
+        self.outline_service = outline_service or default_outline_service
+        if state is None:
+            # Imported top-level entries extend the target's last rank
+            siblings = self.outline_service.get_siblings(outline.get("items", []), parent_id)
+            if any(sibling.get("rank") is None for sibling in siblings):
+                self.outline_service.rebalance_ranks(siblings)
+            prefix = siblings[-1]["rank"] if siblings else ""
+            state = {
+                "importId": new_id("import"),
+                "parentId": parent_id,
+                "processed": 0,
+                "stack": [],
+                # Open parent id ("" for the import target) -> [rank prefix, next index]
+                "counters": {"": [prefix, 0]},
+            }
+        self.state = state
+
+    @property
+    def processed(self) -> int:
+        return self.state["processed"]
+
+    def add(self, level: int, content: str, style: Optional[str] = None) -> Dict[str, Any]:
+        """Create the item for one entry"""
+        stack = self.state["stack"]
+        counters = self.state["counters"]
+        # Close ancestors at the same or a deeper level
+        while stack and stack[-1][0] >= level:
+            counters.pop(stack.pop()[1], None)
+        parent_key = stack[-1][1] if stack else ""
+
+        prefix, index = counters.setdefault(parent_key, ["", 0])
+        counters[parent_key][1] = index + 1
+
+        now = datetime.utcnow().isoformat()
+        item = {
+            "id": new_id("item"),
+            "content": content,
+            "parentId": parent_key or self.state["parentId"],
+            "outlineId": self.outline_id,
+            "order": index,
+            "rank": sequence_rank(index, prefix),
+            "style": style,
+            "formatting": None,
+            "createdAt": now,
+            "updatedAt": now
+        }
+        stack.append([level, item["id"]])
+        self.state["processed"] += 1
+        return item
@@ -0,0 +1,109 @@
+"""Compact item records used while building outline trees
+
+Stored items are plain dicts. Building a response used to copy every item
+into a second dict and then validate the whole tree into ``OutlineItem``
+models, so a request held the outline about three times over. An
+``ItemRecord`` keeps the same fields in ``__slots__`` and references the
+stored values instead of copying them; records are only turned into dicts
+or JSON at the API boundary.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+# Fields in ``OutlineItem`` order, excluding children
+ITEM_FIELDS = (
+    "id", "content", "parentId", "outlineId", "order", "rank",
+    "hasChildren", "childCount", "style", "formatting", "createdAt", "updatedAt"
+)
+
+
+class ItemRecord:
+    """One outline item and its child records"""
+
+    __slots__ = ITEM_FIELDS + ("children",)
+
+    def __init__(self, item: Dict[str, Any]):
+        self.id = item.get("id")
+        self.content = item.get("content")
+        self.parentId = item.get("parentId")
+        self.outlineId = item.get("outlineId")
+        self.order = item.get("order", 0)
+        self.rank = item.get("rank")
+        self.hasChildren = None
+        self.childCount = None
+        self.style = item.get("style")
+        self.formatting = item.get("formatting")
+        self.createdAt = item.get("createdAt")
+        self.updatedAt = item.get("updatedAt")
+        self.children: List["ItemRecord"] = []
+
+    def fields(self) -> Dict[str, Any]:
+        """The record's own fields as a dict, dropping unset values (except parentId)"""
+        values = {}
+        for field in ITEM_FIELDS:
+            value = getattr(self, field)
+            if value is not None or field == "parentId":
+                values[field] = value
+        return values
+
+
+def records_to_dicts(records: List[ItemRecord]) -> List[Dict[str, Any]]:
+    """Convert a record forest into nested item dicts"""
+    result: List[Dict[str, Any]] = []
+    # Iterative, so arbitrarily deep outlines cannot hit the recursion limit
+    stack = [(records, result)]
+    while stack:
+        source, target = stack.pop()
+        for record in source:
+            node = record.fields()
+            node["children"] = []
+            target.append(node)
+            if record.children:
+                stack.append((record.children, node["children"]))
+    return result
+
+
+def iter_encode_records(records: List[ItemRecord], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Serialize a record forest to JSON in the ``List[OutlineItem]`` shape
+
+    The output is yielded in chunks of about ``chunk_size`` bytes, so the
+    full response body is never held in memory.
+    """
+    # Missing timestamps get the time of the request, as model defaults would
+    now = datetime.utcnow().isoformat()
+
+    def to_json(record: ItemRecord) -> Dict[str, Any]:
+        return {
+            "id": record.id,
+            "content": record.content if record.content is not None else "",
+            "parentId": record.parentId,
+            "outlineId": record.outlineId,
+            "order": record.order,
+            "rank": record.rank,
+            "children": record.children,
+            "hasChildren": record.hasChildren,
+            "childCount": record.childCount,
+            "style": record.style,
+            "formatting": record.formatting,
+            "createdAt": record.createdAt or now,
+            "updatedAt": record.updatedAt or now,
+        }
+
+    encoder = json.JSONEncoder(default=to_json, ensure_ascii=False, separators=(",", ":"))
+    buffer: List[str] = []
+    size = 0
+    for fragment in encoder.iterencode(records):
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def encode_records(records: List[ItemRecord]) -> bytes:
+    """Serialize a record forest to a single JSON body"""
+    return b"".join(iter_encode_records(records))
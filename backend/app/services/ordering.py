@@ -0,0 +1,94 @@
+"""Fractional ordering keys for outline siblings
+
+Items are ordered within their parent by a string ``rank``. Ranks are
+base-62 fractions (the digits after the point, without trailing zeros), so
+plain string comparison gives the sibling order and a new key can always be
+generated between any two neighbours. Inserting or moving an item therefore
+only rewrites that one item instead of renumbering its siblings.
+"""
+from typing import Any, Dict, List, Optional
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+_DIGIT_INDEX = {digit: i for i, digit in enumerate(DIGITS)}
+
+# Keys grow by roughly one digit every few inserts at the same spot; once a
+# key gets this long its sibling group is respread to short keys.
+MAX_RANK_LENGTH = 24
+
+# Ranks generated one at a time (see sequence_rank) are fixed-width counters
+# stepped by SEQUENCE_STRIDE, leaving room for later inserts between them
+SEQUENCE_WIDTH = 4
+SEQUENCE_STRIDE = BASE
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    """Key strictly between fractions ``a`` and ``b`` (``None`` means 1)"""
+    if b is not None:
+        # Copy the common prefix, treating a missing digit of ``a`` as zero
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = _DIGIT_INDEX[a[0]] if a else 0
+    digit_b = _DIGIT_INDEX[b[0]] if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    # Adjacent digits: keep b's first digit if b continues, otherwise go
+    # one level deeper after a's first digit
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """Generate a rank that sorts after ``before`` and before ``after``
+
+    Either bound may be ``None`` to mean the start or end of the list.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"Invalid rank bounds: {before!r} >= {after!r}")
+    return _midpoint(before or "", after)
+
+
+def spread_ranks(count: int) -> List[str]:
+    """Generate ``count`` evenly spaced, increasing ranks"""
+    if count <= 0:
+        return []
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    span = BASE ** width
+    return [_fixed_width(i * span // (count + 1), width) for i in range(1, count + 1)]
+
+
+def _fixed_width(value: int, width: int) -> str:
+    """Encode ``value`` as ``width`` base-62 digits without trailing zeros"""
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits)).rstrip("0")
+
+
+def sequence_rank(n: int, prefix: str = "") -> str:
+    """The ``n``-th rank (from 0) of an increasing run extending ``prefix``
+
+    Unlike ``spread_ranks`` the length of the run need not be known up front,
+    so items can be ranked as they stream in. Every key sorts after
+    ``prefix``; when a run outgrows its width it continues under its last
+    key, which keeps the order intact.
+    """
+    capacity = BASE ** SEQUENCE_WIDTH // SEQUENCE_STRIDE - 1
+    while n >= capacity:
+        prefix += _fixed_width(capacity * SEQUENCE_STRIDE, SEQUENCE_WIDTH)
+        n -= capacity
+    return prefix + _fixed_width((n + 1) * SEQUENCE_STRIDE, SEQUENCE_WIDTH)
+
+
+def item_sort_key(item: Dict[str, Any]):
+    """Sibling sort key: ranked items by rank, legacy items by integer order"""
+    rank = item.get("rank")
+    return (rank is None, rank or "", item.get("order", 0))
@@ -1,132 +1,252 @@
 """Outline service for managing hierarchical data operations"""
-from typing import List, Dict, Any, Optional, Set
+from typing import Callable, Iterator, List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 
+from app.core.tracing import traced
+from app.services.item_record import ItemRecord, records_to_dicts
+from app.services.ordering import (
+    MAX_RANK_LENGTH, item_sort_key, rank_between, spread_ranks
+)
+
 
 class OutlineService:
     """Service for outline operations"""
     
-    def build_item_tree(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Build hierarchical tree structure from flat items list"""
-        if not items:
-            return []
-            
-        # Create a map for quick lookup, preserving all fields including style and formatting
-        item_map = {}
+    def index_children(self, items: List[Dict[str, Any]]) -> Dict[Optional[str], List[Dict[str, Any]]]:
+        """Group items by parent ID in a single pass (groups are unsorted)"""
+        children: Dict[Optional[str], List[Dict[str, Any]]] = {}
         for item in items:
-            # Ensure all fields are preserved, handle missing fields gracefully
-            item_copy = {
-                "id": item.get("id"),
-                "content": item.get("content"),
-                "parentId": item.get("parentId"),
-                "order": item.get("order", 0),
-                "style": item.get("style"),
-                "formatting": item.get("formatting"),
-                "createdAt": item.get("createdAt"),
-                "updatedAt": item.get("updatedAt"),
-                "children": []
-            }
-            # Only add outlineId if it exists
-            if "outlineId" in item:
-                item_copy["outlineId"] = item["outlineId"]
-            
-            # Remove None values but keep empty strings and parentId
-            item_copy = {k: v for k, v in item_copy.items() if v is not None or k == "parentId"}
-            item_map[item["id"]] = item_copy
+            children.setdefault(item.get("parentId"), []).append(item)
+        return children
+    
+    def walk_tree(
+        self, items: List[Dict[str, Any]]
+    ) -> Iterator[Tuple[Dict[str, Any], int, bool]]:
+        """Walk the tree depth-first in sibling order without building it
         
-        root_items = []
-        processed = set()  # Track processed items to prevent circular references
+        Yields ``(item, level, True)`` when an item is entered and
+        ``(item, level, False)`` once all of its descendants have been
+        yielded, so callers can open and close nested structures.
+        """
+        children = self.index_children(items)
+        visited = set()  # Guard against circular parent references
+        # Each stack entry: (item, level, entering)
+        stack = [(item, 0, True) for item in reversed(sorted(children.get(None, []), key=item_sort_key))]
+        while stack:
+            item, level, entering = stack.pop()
+            if not entering:
+                yield item, level, False
+                continue
+            if item["id"] in visited:
+                continue
+            visited.add(item["id"])
         
-        # Build tree structure with circular reference prevention
-        for item in items:
-            item_id = item.get("id")
-            if item_id in processed:
+            yield item, level, True
+            stack.append((item, level, False))
+            for child in reversed(sorted(children.get(item["id"], []), key=item_sort_key)):
+                stack.append((child, level + 1, True))
+    
+    @traced("service")
+    def build_records(
+        self,
+        items: List[Dict[str, Any]],
+        root_id: Optional[str] = None,
+        depth: Optional[int] = None
+    ) -> Optional[List[ItemRecord]]:
+        """Build the tree below ``root_id`` (or the top level) down to ``depth``
+        
+        ``depth`` counts levels below the starting nodes; nodes whose children
+        are cut off get ``hasChildren``/``childCount`` instead. Nodes are
+        compact ``ItemRecord``s whose ``order`` is their sibling position.
+        Items that are orphaned or part of a parent cycle are left out.
+        Returns None if the root is missing.
+        """
+        children = self.index_children(items)
+        if root_id is None:
+            start = children.get(None, [])
+        else:
+            root = next((item for item in items if item["id"] == root_id), None)
+            if root is None:
+                return None
+            start = [root]
+        
+        result: List[ItemRecord] = []
+        visited = set()  # Guard against circular parent references
+        # Each stack entry: (source item, level, list to append the record to)
+        stack = [(item, 0, result) for item in reversed(sorted(start, key=item_sort_key))]
+        while stack:
+            item, level, siblings = stack.pop()
+            if item["id"] in visited:
                 continue
-            processed.add(item_id)
+            visited.add(item["id"])
             
-            parent_id = item.get("parentId")
+            record = ItemRecord(item)
+            if item["id"] == root_id:
+                record.order = self.sibling_position(items, item)
+            else:
+                record.order = len(siblings)
+            siblings.append(record)
             
-            if parent_id and parent_id != item_id:  # Prevent self-reference
-                parent = item_map.get(parent_id)
-                if parent and item_id in item_map:
-                    # Check we're not creating a circular reference
-                    if parent_id not in item_map.get(item_id, {}).get("children", []):
-                        parent["children"].append(item_map[item_id])
-            elif not parent_id:
-                if item_id in item_map:
-                    root_items.append(item_map[item_id])
-        
-        # Sort by order with depth limit to prevent infinite recursion
-        def sort_by_order(items_list, depth=0, max_depth=100):
-            if depth > max_depth:
-                return  # Prevent infinite recursion
-            items_list.sort(key=lambda x: x.get("order", 0))
-            for item in items_list:
-                children = item.get("children", [])
-                if children and isinstance(children, list):
-                    sort_by_order(children, depth + 1, max_depth)
-        
-        sort_by_order(root_items)
-        return root_items
+            item_children = children.get(item["id"])
+            if not item_children:
+                continue
+            if depth is not None and level >= depth:
+                record.hasChildren = True
+                record.childCount = len(item_children)
+                continue
+            for child in reversed(sorted(item_children, key=item_sort_key)):
+                stack.append((child, level + 1, record.children))
+        
+        return result
+    
+    def build_subtree(
+        self,
+        items: List[Dict[str, Any]],
+        root_id: Optional[str] = None,
+        depth: Optional[int] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Build a (possibly depth-limited) slice of the tree as nested dicts"""
+        records = self.build_records(items, root_id, depth)
+        return None if records is None else records_to_dicts(records)
+    
+    def build_item_tree(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Build hierarchical tree structure from flat items list"""
+        return records_to_dicts(self.build_records(items))
     
     def get_item_and_children(self, items: List[Dict[str, Any]], item_id: str) -> Set[str]:
         """Get an item and all its descendant IDs"""
+        children = self.index_children(items)
         ids_to_remove = {item_id}
+        # Iterative over the child index: linear, and safe for deep or cyclic trees
+        stack = [item_id]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child["id"] not in ids_to_remove:
+                    ids_to_remove.add(child["id"])
+                    stack.append(child["id"])
+        return ids_to_remove
+    
+    def get_siblings(
+        self,
+        items: List[Dict[str, Any]],
+        parent_id: Optional[str],
+        exclude_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the children of ``parent_id`` in display order"""
+        siblings = [
+            item for item in items
+            if item.get("parentId") == parent_id and item["id"] != exclude_id
+        ]
+        siblings.sort(key=item_sort_key)
+        return siblings
+    
+    def rebalance_ranks(self, siblings: List[Dict[str, Any]]) -> None:
+        """Assign short, evenly spaced ranks to an ordered sibling group
         
-        # Find all children recursively
-        def find_children(parent_id: str):
-            for item in items:
-                if item.get("parentId") == parent_id:
-                    ids_to_remove.add(item["id"])
-                    find_children(item["id"])
+        Also converts legacy groups that only have an integer ``order``.
+        """
+        for position, (sibling, rank) in enumerate(zip(siblings, spread_ranks(len(siblings)))):
+            sibling["rank"] = rank
+            sibling["order"] = position
+    
+    @traced("service")
+    def place_item(
+        self,
+        items: List[Dict[str, Any]],
+        item: Dict[str, Any],
+        parent_id: Optional[str],
+        position: Optional[int] = None,
+        writable: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Move ``item`` under ``parent_id`` at ``position`` (None = last)
         
-        find_children(item_id)
-        return ids_to_remove
+        Only ``item`` is rewritten, unless its new siblings still use integer
+        ordering or its rank grew past MAX_RANK_LENGTH, in which case the
+        sibling group is respread once. ``writable`` is applied to siblings
+        before they are modified, for callers that copy items on write.
+        """
+        siblings = self.get_siblings(items, parent_id, exclude_id=item["id"])
+        if any(sibling.get("rank") is None for sibling in siblings):
+            if writable:
+                siblings = [writable(sibling) for sibling in siblings]
+            self.rebalance_ranks(siblings)
+        
+        if position is None or position > len(siblings):
+            position = len(siblings)
+        position = max(position, 0)
+        
+        before = siblings[position - 1]["rank"] if position > 0 else None
+        after = siblings[position]["rank"] if position < len(siblings) else None
+        
+        item["parentId"] = parent_id
+        item["rank"] = rank_between(before, after)
+        item["order"] = position
+        
+        if len(item["rank"]) > MAX_RANK_LENGTH:
+            if writable:
+                siblings = [writable(sibling) for sibling in siblings]
+            siblings.insert(position, item)
+            self.rebalance_ranks(siblings)
+        
+        return item
     
+    @traced("service")
+    def append_ranks(
+        self,
+        items: List[Dict[str, Any]],
+        parent_id: Optional[str],
+        count: int
+    ) -> List[str]:
+        """Generate ranks for ``count`` new items after the last child of ``parent_id``"""
+        siblings = self.get_siblings(items, parent_id)
+        if not siblings:
+            return spread_ranks(count)
+        if any(sibling.get("rank") is None for sibling in siblings):
+            self.rebalance_ranks(siblings)
+        # Every key extending the largest rank still sorts after it
+        last_rank = siblings[-1]["rank"]
+        return [last_rank + rank for rank in spread_ranks(count)]
+    
+    def sibling_position(self, items: List[Dict[str, Any]], item: Dict[str, Any]) -> int:
+        """Get the display position of an item among its siblings"""
+        key = item_sort_key(item)
+        return sum(
+            1 for other in items
+            if other.get("parentId") == item.get("parentId")
+            and other["id"] != item["id"]
+            and item_sort_key(other) < key
+        )
+    
+    @traced("service")
     def indent_item(self, items: List[Dict[str, Any]], item_id: str) -> Optional[Dict[str, Any]]:
-        """Indent an item (make it a child of the previous sibling)"""
+        """Indent an item (make it the first child of the previous sibling)"""
         # Find the item
         target_item = None
-        target_index = -1
         
-        for i, item in enumerate(items):
+        for item in items:
             if item["id"] == item_id:
                 target_item = item
-                target_index = i
                 break
         
         if not target_item:
             return None
         
-        # Find previous sibling (same parent, lower order)
-        siblings = [
-            (i, item) for i, item in enumerate(items)
-            if item.get("parentId") == target_item.get("parentId") 
-            and item.get("order", 0) < target_item.get("order", 0)
-        ]
+        # Find previous sibling (same parent, sorted before the item)
+        siblings = self.get_siblings(items, target_item.get("parentId"))
+        position = siblings.index(target_item)
         
-        if not siblings:
+        if position == 0:
             return None
         
-        # Get the last sibling (highest order among previous siblings)
-        siblings.sort(key=lambda x: x[1].get("order", 0))
-        prev_sibling_index, prev_sibling = siblings[-1]
+        prev_sibling = siblings[position - 1]
         
-        # Update target item's parent
-        target_item["parentId"] = prev_sibling["id"]
-        target_item["order"] = 0  # First child of new parent
+        # First child of the previous sibling; only the target is rewritten
+        self.place_item(items, target_item, prev_sibling["id"], 0)
         target_item["updatedAt"] = datetime.utcnow().isoformat()
         
-        # Update order of new siblings
-        new_siblings = [
-            item for item in items
-            if item.get("parentId") == prev_sibling["id"] and item["id"] != item_id
-        ]
-        for i, sibling in enumerate(new_siblings):
-            sibling["order"] = i + 1
-        
         return target_item
     
+    @traced("service")
     def outdent_item(self, items: List[Dict[str, Any]], item_id: str) -> Optional[Dict[str, Any]]:
         """Outdent an item (move it up one level)"""
         # Find the item
@@ -150,28 +270,16 @@ class OutlineService:
         if not parent:
             return None
         
-        # Update target item
-        target_item["parentId"] = parent.get("parentId")  # Grandparent becomes parent
-        
-        # Calculate new order (after parent)
-        if parent.get("parentId"):
-            # Find parent's siblings
-            parent_siblings = [
-                item for item in items
-                if item.get("parentId") == parent.get("parentId")
-            ]
-            parent_order = parent.get("order", 0)
-            target_item["order"] = parent_order + 1
-            
-            # Update order of siblings after parent
-            for sibling in parent_siblings:
-                if sibling.get("order", 0) > parent_order:
-                    sibling["order"] = sibling.get("order", 0) + 1
+        grandparent_id = parent.get("parentId")
+        if grandparent_id:
+            # Directly after the parent among the grandparent's children
+            parent_siblings = self.get_siblings(items, grandparent_id, exclude_id=item_id)
+            position = parent_siblings.index(parent) + 1
         else:
             # Moving to root level
-            root_items = [item for item in items if not item.get("parentId")]
-            target_item["order"] = len(root_items)
+            position = None
         
+        self.place_item(items, target_item, grandparent_id, position)
         target_item["updatedAt"] = datetime.utcnow().isoformat()
         
         return target_item
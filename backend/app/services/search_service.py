@@ -0,0 +1,335 @@
+"""Full-text search over item content across a user's outlines
+
+Each user gets an in-memory inverted index (term -> {document: term
+frequency}) ranked with BM25. Query terms also match indexed terms they
+are a prefix of. Indexes are updated incrementally from the outline
+mutation handlers, persisted as JSON under SEARCH_INDEX_DIR, and loaded or
+rebuilt lazily on a user's first search.
+"""
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Query terms shorter than this only match exactly
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 64
+FORMAT_VERSION = 1
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+class UserSearchIndex:
+    """Inverted index over every item of one user's outlines"""
+
+    def __init__(self):
+        # Document key "outlineId:itemId" -> (outlineId, itemId, parentId, content)
+        self.docs: Dict[str, Tuple[str, str, Optional[str], str]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        # Sorted vocabulary for prefix lookups. New terms are queued and
+        # merged on the next query; removed terms are skipped until compaction.
+        self.terms: List[str] = []
+        self._pending_terms: List[str] = []
+        self._removed_terms = 0
+        self.total_length = 0
+        # outlineId -> {"title", "updatedAt", "keys"}
+        self.outlines: Dict[str, Dict[str, Any]] = {}
+
+    # Maintenance
+    def index_outline(self, outline: Dict[str, Any]) -> int:
+        """Bring one outline up to date; returns the number of items reindexed"""
+        outline_id = outline["id"]
+        entry = self.outlines.setdefault(outline_id, {"keys": set()})
+        entry["title"] = outline.get("title", "")
+        entry["updatedAt"] = outline.get("updatedAt")
+
+        changed = 0
+        seen = set()
+        for item in outline.get("items", []):
+            key = f"{outline_id}:{item['id']}"
+            seen.add(key)
+            doc = (outline_id, item["id"], item.get("parentId"), item.get("content") or "")
+            if self.docs.get(key) == doc:
+                continue
+            self._remove_doc(key)
+            self._add_doc(key, doc)
+            changed += 1
+
+        for key in entry["keys"] - seen:
+            self._remove_doc(key)
+            changed += 1
+        entry["keys"] = seen
+        return changed
+
+    def remove_outline(self, outline_id: str) -> None:
+        """Drop an outline and all of its items"""
+        entry = self.outlines.pop(outline_id, None)
+        if entry:
+            for key in entry["keys"]:
+                self._remove_doc(key)
+
+    def _add_doc(self, key: str, doc: Tuple[str, str, Optional[str], str]) -> None:
+        tokens = tokenize(doc[3])
+        self.docs[key] = doc
+        self.doc_lengths[key] = len(tokens)
+        self.total_length += len(tokens)
+        for term, tf in Counter(tokens).items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                self._pending_terms.append(term)
+            postings[key] = tf
+
+    def _remove_doc(self, key: str) -> None:
+        doc = self.docs.pop(key, None)
+        if doc is None:
+            return
+        self.total_length -= self.doc_lengths.pop(key, 0)
+        for term in set(tokenize(doc[3])):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self.postings[term]
+                self._removed_terms += 1
+
+    # Querying
+    def _sorted_terms(self) -> List[str]:
+        if self._removed_terms > len(self.postings) // 2:
+            self.terms = sorted(self.postings)
+            self._pending_terms = []
+            self._removed_terms = 0
+        elif self._pending_terms:
+            # Timsort merges the sorted run and the new terms in near-linear time
+            self.terms.extend(self._pending_terms)
+            self.terms.sort()
+            self._pending_terms = []
+        return self.terms
+
+    def expand(self, token: str) -> List[str]:
+        """Indexed terms matching a query token (exact match plus prefixes)"""
+        if len(token) < MIN_PREFIX_LENGTH:
+            return [token] if token in self.postings else []
+        terms = self._sorted_terms()
+        matches = []
+        position = bisect.bisect_left(terms, token)
+        while position < len(terms) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            term = terms[position]
+            if not term.startswith(token):
+                break
+            # Skip removed terms and duplicates of re-added ones
+            if term in self.postings and (not matches or matches[-1] != term):
+                matches.append(term)
+            position += 1
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """Rank documents for a query with BM25; returns (key, score) pairs"""
+        tokens = tokenize(query)
+        doc_count = len(self.docs)
+        if not tokens or not doc_count:
+            return []
+        avg_length = self.total_length / doc_count or 1.0
+
+        scores: Dict[str, float] = {}
+        doc_lengths = self.doc_lengths
+        for token in set(tokens):
+            for term in self.expand(token):
+                postings = self.postings[term]
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                # Prefix matches count a little less than exact matches
+                weight = idf if term == token else idf * 0.8
+                for key, tf in postings.items():
+                    norm = K1 * (1 - B + B * doc_lengths[key] / avg_length)
+                    scores[key] = scores.get(key, 0.0) + weight * tf * (K1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda pair: pair[1])
+
+    def breadcrumbs(self, key: str) -> List[Dict[str, str]]:
+        """Ancestors of a document, outermost first"""
+        outline_id, _, parent_id, _ = self.docs[key]
+        crumbs = []
+        seen = set()
+        while parent_id and parent_id not in seen:
+            seen.add(parent_id)
+            parent = self.docs.get(f"{outline_id}:{parent_id}")
+            if parent is None:
+                break
+            crumbs.append({"id": parent[1], "content": parent[3]})
+            parent_id = parent[2]
+        crumbs.reverse()
+        return crumbs
+
+    # Persistence
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": FORMAT_VERSION,
+            "outlines": {
+                outline_id: {"title": entry["title"], "updatedAt": entry["updatedAt"]}
+                for outline_id, entry in self.outlines.items()
+            },
+            "docs": [list(doc) for doc in self.docs.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserSearchIndex":
+        index = cls()
+        for outline_id, entry in data.get("outlines", {}).items():
+            index.outlines[outline_id] = {**entry, "keys": set()}
+        for outline_id, item_id, parent_id, content in data.get("docs", []):
+            key = f"{outline_id}:{item_id}"
+            index._add_doc(key, (outline_id, item_id, parent_id, content))
+            if outline_id in index.outlines:
+                index.outlines[outline_id]["keys"].add(key)
+        return index
+
+
+class SearchService:
+    """Per-user search indexes with lazy loading and debounced persistence"""
+
+    def __init__(self, index_dir: Optional[str] = None, flush_delay: float = 2.0):
+        self.index_dir = Path(index_dir or settings.SEARCH_INDEX_DIR)
+        self.flush_delay = flush_delay
+        self.indexes: Dict[str, UserSearchIndex] = {}
+        self._dirty: set = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def _index_path(self, user_id: str) -> Path:
+        safe_id = re.sub(r"[^\w.-]", "_", user_id)
+        return self.index_dir / f"{safe_id}.json"
+
+    # Mutation hooks
+    def index_outline(self, user_id: str, outline: Dict[str, Any]) -> None:
+        """Reindex an outline after a write
+
+        Users whose index is not loaded are skipped; their index catches up
+        from ``updatedAt`` when it is next loaded.
+        """
+        index = self.indexes.get(user_id)
+        if index is not None:
+            index.index_outline(outline)
+            self._mark_dirty(user_id)
+
+    def remove_outline(self, user_id: str, outline_id: str) -> None:
+        """Drop a deleted outline from the user's index"""
+        index = self.indexes.get(user_id)
+        if index is not None:
+            index.remove_outline(outline_id)
+            self._mark_dirty(user_id)
+
+    # Querying
+    async def get_index(self, user_id: str, storage) -> UserSearchIndex:
+        """Load (or build) a user's index and sync it with storage"""
+        index = self.indexes.get(user_id)
+        if index is not None:
+            return index
+
+        index = self._load(user_id) or UserSearchIndex()
+        documents = await storage.get_user_documents(user_id)
+        stale = 0
+        for doc in documents:
+            entry = index.outlines.get(doc["id"])
+            if entry is None or entry.get("updatedAt") != doc.get("updatedAt"):
+                index.index_outline(doc)
+                stale += 1
+        live_ids = {doc["id"] for doc in documents}
+        for outline_id in list(index.outlines):
+            if outline_id not in live_ids:
+                index.remove_outline(outline_id)
+                stale += 1
+
+        self.indexes[user_id] = index
+        if stale:
+            logger.info(f"Search index for {user_id}: reindexed {stale} outlines")
+            self._mark_dirty(user_id)
+        return index
+
+    @traced("service")
+    async def search(self, user_id: str, query: str, storage, limit: int = 20) -> List[Dict[str, Any]]:
+        """Search a user's items and return ranked results with breadcrumbs"""
+        index = await self.get_index(user_id, storage)
+        results = []
+        for key, score in index.search(query, limit):
+            outline_id, item_id, _, content = index.docs[key]
+            results.append({
+                "outlineId": outline_id,
+                "outlineTitle": index.outlines.get(outline_id, {}).get("title", ""),
+                "itemId": item_id,
+                "content": content,
+                "score": round(score, 4),
+                "breadcrumbs": index.breadcrumbs(key),
+            })
+        return results
+
+    # Persistence
+    def _load(self, user_id: str) -> Optional[UserSearchIndex]:
+        path = self._index_path(user_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != FORMAT_VERSION:
+                return None
+            return UserSearchIndex.from_dict(data)
+        except (json.JSONDecodeError, IOError, ValueError) as e:
+            logger.warning(f"Discarding unreadable search index {path}: {e}")
+            return None
+
+    def _mark_dirty(self, user_id: str) -> None:
+        self._dirty.add(user_id)
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self.flush)
+
+    def flush(self) -> None:
+        """Write every modified index to disk"""
+        self._flush_handle = None
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            for user_id in dirty:
+                index = self.indexes.get(user_id)
+                if index is None:
+                    continue
+                path = self._index_path(user_id)
+                tmp_path = path.with_suffix(".tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(index.to_dict(), f)
+                os.replace(tmp_path, path)
+        except IOError as e:
+            logger.warning(f"Could not persist search index: {e}")
+
+
+# Global service instance
+search_service = SearchService()
@@ -1,7 +1,9 @@
 """Voice and AI service for transcription and text structuring"""
 import re
 from typing import List, Dict, Any
+from app.core.ids import new_id
 from app.models.voice import StructuredItem
+from app.services.outline_service import outline_service
 
 
 class VoiceService:
@@ -107,14 +109,15 @@ class VoiceService:
                 # Add as a new item
                 from datetime import datetime
                 new_item = {
-                    "id": f"item_{int(datetime.utcnow().timestamp() * 1000)}",
+                    "id": new_id("item"),
                     "content": content.capitalize(),
                     "parentId": None,
                     "outlineId": outline["id"],
-                    "order": len([i for i in items if not i.get("parentId")]),
+                    "order": 0,
                     "createdAt": datetime.utcnow().isoformat(),
                     "updatedAt": datetime.utcnow().isoformat()
                 }
+                outline_service.place_item(items, new_item, None)
                 items.append(new_item)
                 outline["items"] = items
                 modified_count = 1
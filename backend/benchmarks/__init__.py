@@ -0,0 +1,9 @@
+"""Load tests and benchmarks
+
+Run from the backend directory::
+
+    python -m benchmarks.loadtest --users 20 --items 500 --output results.json
+
+The app is driven in-process over ``httpx.ASGITransport`` against the mock
+store, with LLM calls answered by a local fake OpenAI server.
+"""
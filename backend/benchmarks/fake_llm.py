@@ -0,0 +1,91 @@
+"""Fake OpenAI-compatible server for load tests
+
+Answers ``POST /v1/chat/completions`` with a canned outline after a fixed
+delay, so LLM-backed endpoints can be exercised without network access or
+API keys. Point the app at it with ``OPENAI_BASE_URL``.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_RESULT = {
+    "items": [
+        {"text": "SPOV: Retention beats acquisition", "children": [
+            {"text": "Evidence: churned users never finished onboarding", "children": []},
+            {"text": "Insight: activation is a retention lever", "children": []},
+        ]},
+    ],
+    "suggestions": ["Add supporting evidence"],
+}
+
+
+class FakeLLMServer:
+    """Threaded HTTP server speaking the chat completions API"""
+
+    def __init__(self, latency: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if not self.path.endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                request = json.loads(body or b"{}")
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+                content = json.dumps(CANNED_RESULT)
+                payload = json.dumps({
+                    "id": f"chatcmpl-fake-{server.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": len(body) // 4, "completion_tokens": len(content) // 4,
+                              "total_tokens": (len(body) + len(content)) // 4},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
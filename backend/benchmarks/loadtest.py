@@ -0,0 +1,363 @@
+"""In-process load test against the mock store
+
+Seeds synthetic users and outlines, then runs a weighted mix of scenarios
+through the ASGI app with a fixed number of concurrent virtual users:
+
+- ``browse``: list outlines, open one and load its item tree
+- ``type``: create an item and save it a few times as the user types
+- ``indent``: create two items, indent the second and outdent it again
+- ``paste``: paste a block of nested items as one batch
+- ``voice``: add structured items from a voice transcript
+- ``llm``: ask for AI-generated content (answered by ``FakeLLMServer``)
+
+The scenario sequence is derived from the seed, so runs with the same
+options issue the same requests. Throughput and per-operation latency
+percentiles are written as JSON for comparing runs over time.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from httpx import ASGITransport, AsyncClient
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+DEFAULT_MIX = {"browse": 5, "type": 3, "indent": 1, "paste": 1, "voice": 1, "llm": 0}
+
+API = "/api/v1"
+
+
+@dataclass
+class LoadConfig:
+    users: int = 10
+    outlines_per_user: int = 2
+    items_per_outline: int = 200
+    depth: int = 4
+    concurrency: int = 10
+    iterations: int = 20  # Scenarios run per user
+    mix: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    paste_size: int = 50
+    llm_latency: float = 0.05
+    seed: int = 0
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """Parse ``"browse=5,type=3"``; scenarios not named get weight 0"""
+    mix = {name: 0 for name in SCENARIOS}
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, weight = entry.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name}")
+        mix[name] = int(weight)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Recorder:
+    """Latency samples and error counts per operation"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, operation: str, seconds: float, ok: bool) -> None:
+        self.samples[operation].append(seconds)
+        if not ok:
+            self.errors[operation] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        operations = {}
+        for operation, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            operations[operation] = {
+                "count": len(ordered),
+                "errors": self.errors.get(operation, 0),
+                "throughput": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                "meanMs": round(sum(ordered) / len(ordered) * 1000, 3),
+                "p50Ms": round(percentile(ordered, 50) * 1000, 3),
+                "p90Ms": round(percentile(ordered, 90) * 1000, 3),
+                "p99Ms": round(percentile(ordered, 99) * 1000, 3),
+                "maxMs": round(ordered[-1] * 1000, 3),
+            }
+        return operations
+
+
+class Session:
+    """One scenario run on behalf of a synthetic user"""
+
+    def __init__(self, client: AsyncClient, recorder: Recorder, user, rng: random.Random, config: LoadConfig):
+        self.client = client
+        self.recorder = recorder
+        self.user = user
+        self.rng = rng
+        self.config = config
+        self.headers = {"X-Test-User-Id": user.id}
+
+    async def call(self, method: str, operation: str, url: str, **kwargs):
+        """Issue a request, recording its latency under ``METHOD operation``"""
+        start = time.perf_counter()
+        response = await self.client.request(method, API + url, headers=self.headers, **kwargs)
+        # Streaming responses are only complete once the body is read
+        await response.aread()
+        self.recorder.record(f"{method} {operation}", time.perf_counter() - start, response.status_code < 400)
+        return response
+
+    def outline_id(self) -> str:
+        return self.rng.choice(self.user.outline_ids)
+
+    async def create_item(self, outline_id: str, content: str, parent_id: Optional[str] = None) -> Optional[str]:
+        response = await self.call(
+            "POST", "/outlines/{outline_id}/items", f"/outlines/{outline_id}/items",
+            json={"content": content, "parentId": parent_id}
+        )
+        return response.json()["id"] if response.status_code < 400 else None
+
+
+async def browse(session: Session) -> None:
+    await session.call("GET", "/outlines", "/outlines")
+    outline_id = session.outline_id()
+    await session.call("GET", "/outlines/{outline_id}", f"/outlines/{outline_id}")
+    await session.call("GET", "/outlines/{outline_id}/items", f"/outlines/{outline_id}/items")
+
+
+async def type_item(session: Session) -> None:
+    from benchmarks.synthetic import sentence
+
+    outline_id = session.outline_id()
+    words = sentence(session.rng, 12).split()
+    item_id = await session.create_item(outline_id, words[0])
+    if item_id is None:
+        return
+    # Autosave after each burst of typing
+    for end in (4, 8, 12):
+        await session.call(
+            "PUT", "/outlines/{outline_id}/items/{item_id}", f"/outlines/{outline_id}/items/{item_id}",
+            json={"content": " ".join(words[:end])}
+        )
+
+
+async def indent_outdent(session: Session) -> None:
+    outline_id = session.outline_id()
+    first = await session.create_item(outline_id, "Parent topic")
+    second = await session.create_item(outline_id, "Detail to nest")
+    if first is None or second is None:
+        return
+    url = f"/outlines/{outline_id}/items/{second}"
+    await session.call("POST", "/outlines/{outline_id}/items/{item_id}/indent", url + "/indent")
+    await session.call("POST", "/outlines/{outline_id}/items/{item_id}/outdent", url + "/outdent")
+
+
+async def paste(session: Session) -> None:
+    from benchmarks.synthetic import sentence
+
+    outline_id = session.outline_id()
+    operations = []
+    parent_ref = None
+    for n in range(session.config.paste_size):
+        # Every fifth pasted line starts a new group; the others nest under it
+        if n % 5 == 0:
+            parent_ref = f"paste-{n}"
+            operations.append({"type": "CREATE", "id": parent_ref, "data": {"text": sentence(session.rng, 4)}})
+        else:
+            operations.append({"type": "CREATE", "parentId": parent_ref, "data": {"text": sentence(session.rng)}})
+    await session.call(
+        "POST", "/outlines/{outline_id}/batch", f"/outlines/{outline_id}/batch",
+        json={"operations": operations}
+    )
+
+
+async def voice_add(session: Session) -> None:
+    outline_id = session.outline_id()
+    await session.call(
+        "POST", "/voice/{outline_id}/voice/add-items", f"/voice/{outline_id}/voice/add-items",
+        json={
+            "text": "Quarterly retention review, onboarding drop-off, pricing experiments and partner channels",
+            "structureFirst": True,
+        }
+    )
+
+
+async def llm_create(session: Session) -> None:
+    outline_id = session.outline_id()
+    await session.call(
+        "POST", "/outlines/{outline_id}/llm-action", f"/outlines/{outline_id}/llm-action",
+        json={"type": "create", "userPrompt": "Create an SPOV about customer retention"}
+    )
+
+
+SCENARIOS = {
+    "browse": browse,
+    "type": type_item,
+    "indent": indent_outdent,
+    "paste": paste,
+    "voice": voice_add,
+    "llm": llm_create,
+}
+
+
+def plan(config: LoadConfig, users: list) -> List[tuple]:
+    """The (user, scenario, seed) sequence for a run"""
+    rng = random.Random(config.seed)
+    names = [name for name, weight in config.mix.items() if weight > 0]
+    if not names:
+        raise ValueError("Scenario mix has no positive weights")
+    weights = [config.mix[name] for name in names]
+    jobs = []
+    for _ in range(config.iterations):
+        for user in users:
+            jobs.append((user, rng.choices(names, weights)[0], rng.getrandbits(32)))
+    return jobs
+
+
+async def run_load(config: LoadConfig, store=None) -> Dict[str, Any]:
+    """Seed the store, run the scenario mix and return the report
+
+    The app must have been imported with ``TESTING`` enabled.
+    """
+    from app.core.config import settings
+    from app.main import app
+    from benchmarks.fake_llm import FakeLLMServer
+    from benchmarks.synthetic import seed_store
+
+    if not settings.TESTING:
+        raise RuntimeError("Load tests run against the mock store; set TESTING=true before importing the app")
+    if store is None:
+        from app.db.mock_cosmos import mock_cosmos_client as store
+
+    users = seed_store(store, config.users, config.outlines_per_user, config.items_per_outline, config.depth, config.seed)
+    jobs = plan(config, users)
+    recorder = Recorder()
+
+    fake_llm = None
+    saved_openai = (settings.OPENAI_API_KEY, settings.OPENAI_BASE_URL)
+    if config.mix.get("llm"):
+        fake_llm = FakeLLMServer(latency=config.llm_latency).start()
+        settings.OPENAI_API_KEY = "fake-key"
+        settings.OPENAI_BASE_URL = fake_llm.base_url
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    async def worker(client: AsyncClient):
+        while not queue.empty():
+            user, name, seed = queue.get_nowait()
+            await SCENARIOS[name](Session(client, recorder, user, random.Random(seed), config))
+
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test", timeout=60) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(config.concurrency)))
+            elapsed = time.perf_counter() - start
+    finally:
+        settings.OPENAI_API_KEY, settings.OPENAI_BASE_URL = saved_openai
+        if fake_llm is not None:
+            fake_llm.stop()
+
+    operations = recorder.summary(elapsed)
+    requests = sum(op["count"] for op in operations.values())
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "config": asdict(config),
+        "summary": {
+            "requests": requests,
+            "errors": sum(op["errors"] for op in operations.values()),
+            "durationSeconds": round(elapsed, 3),
+            "throughput": round(requests / elapsed, 2) if elapsed else 0.0,
+            "scenarios": dict(Counter(name for _, name, _ in jobs)),
+        },
+        "operations": operations,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    summary = report["summary"]
+    lines = [
+        f"{summary['requests']} requests in {summary['durationSeconds']}s "
+        f"({summary['throughput']} req/s, {summary['errors']} errors)",
+        f"{'operation':<48} {'count':>6} {'err':>4} {'p50':>9} {'p90':>9} {'p99':>9}",
+    ]
+    for name, op in report["operations"].items():
+        lines.append(
+            f"{name:<48} {op['count']:>6} {op['errors']:>4} "
+            f"{op['p50Ms']:>7.1f}ms {op['p90Ms']:>7.1f}ms {op['p99Ms']:>7.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--outlines", type=int, default=defaults.outlines_per_user, help="Outlines per user")
+    parser.add_argument("--items", type=int, default=defaults.items_per_outline, help="Items per outline")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="Maximum outline depth")
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--iterations", type=int, default=defaults.iterations, help="Scenarios per user")
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="Scenario weights, e.g. browse=5,type=3,llm=1")
+    parser.add_argument("--paste-size", type=int, default=defaults.paste_size)
+    parser.add_argument("--llm-latency", type=float, default=defaults.llm_latency, help="Fake LLM delay in seconds")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--workdir", help="Directory for the mock store files (default: a new temp dir)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    config = LoadConfig(
+        users=args.users,
+        outlines_per_user=args.outlines,
+        items_per_outline=args.items,
+        depth=args.depth,
+        concurrency=args.concurrency,
+        iterations=args.iterations,
+        mix=parse_mix(args.mix),
+        paste_size=args.paste_size,
+        llm_latency=args.llm_latency,
+        seed=args.seed,
+    )
+    output = Path(args.output).resolve() if args.output else None
+
+    # The mock store and search index live in the working directory; keep
+    # them away from development data
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="brainflowy-load-")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ["TESTING"] = "true"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SEARCH_INDEX_DIR", str(workdir / "search_index"))
+
+    report = asyncio.run(run_load(config))
+    print(format_report(report))
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
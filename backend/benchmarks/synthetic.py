@@ -0,0 +1,103 @@
+"""Synthetic users and outlines for load tests"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.ids import new_id
+from app.services.ordering import sequence_rank
+
+WORDS = (
+    "strategy retention churn insight evidence knowledge expert market growth "
+    "pricing onboarding research roadmap signal metric cohort hypothesis launch "
+    "feedback experiment funnel partner channel segment review summary"
+).split()
+
+
+@dataclass
+class SyntheticUser:
+    id: str
+    outline_ids: List[str] = field(default_factory=list)
+
+
+def sentence(rng: random.Random, words: int = 8) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_items(outline_id: str, size: int, depth: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Random tree of ``size`` items at most ``depth`` levels deep"""
+    now = datetime.utcnow().isoformat()
+    items: List[Dict[str, Any]] = []
+    # Open branch as [item id, level]; each new item attaches somewhere on it
+    branch: List[List[Any]] = []
+    child_counts: Dict[Optional[str], int] = {}
+    for _ in range(size):
+        level = rng.randint(0, min(len(branch), depth - 1))
+        del branch[level:]
+        parent_id = branch[-1][0] if branch else None
+        index = child_counts.get(parent_id, 0)
+        child_counts[parent_id] = index + 1
+        item = {
+            "id": new_id("item"),
+            "content": sentence(rng, rng.randint(3, 12)),
+            "parentId": parent_id,
+            "outlineId": outline_id,
+            "order": index,
+            "rank": sequence_rank(index),
+            "style": None,
+            "formatting": None,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        items.append(item)
+        branch.append([item["id"], level])
+    return items
+
+
+def make_outline(user_id: str, size: int, depth: int, rng: random.Random) -> Dict[str, Any]:
+    now = datetime.utcnow().isoformat()
+    outline_id = new_id("outline")
+    items = make_items(outline_id, size, depth, rng)
+    return {
+        "id": outline_id,
+        "title": sentence(rng, 3),
+        "userId": user_id,
+        "items": items,
+        "itemCount": len(items),
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+
+def seed_store(
+    store,
+    users: int,
+    outlines_per_user: int,
+    items_per_outline: int,
+    depth: int,
+    seed: int = 0
+) -> List[SyntheticUser]:
+    """Bulk-load synthetic data into the mock store
+
+    Documents are inserted directly and persisted once, instead of through
+    the API, which would rewrite the store file for every outline.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().isoformat()
+    result = []
+    for n in range(users):
+        user = SyntheticUser(id=new_id("user"))
+        store.users[user.id] = {
+            "id": user.id,
+            "email": f"load-{n}-{user.id}@example.com",
+            "name": f"Load User {n}",
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        for _ in range(outlines_per_user):
+            outline = make_outline(user.id, items_per_outline, depth, rng)
+            store.documents[outline["id"]] = outline
+            user.outline_ids.append(outline["id"])
+        result.append(user)
+    store._save_data()
+    return result
@@ -0,0 +1,177 @@
+"""Microbenchmarks for the OutlineService tree algorithms
+
+Times each operation over a sweep of outline sizes and three shapes:
+
+- ``flat``: every item at the top level
+- ``deep``: a single chain, each item the only child of the previous one
+- ``bushy``: a balanced tree with ``FANOUT`` children per item
+
+``growth_exponent`` fits how running time scales with size (1.0 is
+linear, 2.0 quadratic); ``BUDGETS`` holds the exponent each operation must
+stay under. Run ``python -m benchmarks.tree_ops`` for the full sweep.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.services.ordering import sequence_rank
+from app.services.outline_service import OutlineService
+
+SIZES = (100, 1_000, 10_000, 100_000)
+SHAPES = ("flat", "deep", "bushy")
+FANOUT = 8
+
+# Maximum growth exponent per operation; sorting sibling groups makes the
+# tree operations n log n, which fits well under 1.35 over these sizes
+BUDGETS = {
+    "build_item_tree": 1.35,
+    "get_item_and_children": 1.35,
+    "indent_item": 1.35,
+    "outdent_item": 1.35,
+}
+
+Items = List[Dict[str, Any]]
+
+
+def _item(n: int, parent_id: Optional[str], index: int) -> Dict[str, Any]:
+    return {
+        "id": f"item_{n}",
+        "content": f"Item {n}",
+        "parentId": parent_id,
+        "outlineId": "outline_bench",
+        "order": index,
+        "rank": sequence_rank(index),
+        "createdAt": "2024-01-01T00:00:00",
+        "updatedAt": "2024-01-01T00:00:00",
+    }
+
+
+def make_outline(shape: str, size: int) -> Items:
+    """Items of an outline with the given shape, in creation order"""
+    if shape == "flat":
+        return [_item(n, None, n) for n in range(size)]
+    if shape == "deep":
+        return [_item(n, f"item_{n - 1}" if n else None, 0) for n in range(size)]
+    if shape == "bushy":
+        # Breadth-first numbering: the parent of n is (n - 1) // FANOUT
+        return [
+            _item(n, f"item_{(n - 1) // FANOUT}" if n else None, (n - 1) % FANOUT if n else 0)
+            for n in range(size)
+        ]
+    raise ValueError(f"Unknown shape: {shape}")
+
+
+def _operations(service: OutlineService) -> Dict[str, Callable[[Items], Any]]:
+    """Operation name -> call on a fresh copy of the items
+
+    The subtree and move targets are the worst cases for each shape: the
+    first item owns the whole deep and bushy trees, and the last item is
+    the deepest one.
+    """
+    return {
+        "build_item_tree": lambda items: service.build_item_tree(items),
+        "get_item_and_children": lambda items: service.get_item_and_children(items, items[0]["id"]),
+        "indent_item": lambda items: service.indent_item(items, items[-1]["id"]),
+        "outdent_item": lambda items: service.outdent_item(items, items[-1]["id"]),
+    }
+
+
+def measure(operation: Callable[[Items], Any], items: Items, repeats: int = 3) -> float:
+    """Best time in seconds over ``repeats`` runs, each on a fresh copy"""
+    best = float("inf")
+    for _ in range(repeats):
+        copy = [dict(item) for item in items]  # Moves mutate items
+        start = time.perf_counter()
+        operation(copy)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def sweep(
+    sizes: Sequence[int] = SIZES,
+    shapes: Sequence[str] = SHAPES,
+    operations: Optional[Sequence[str]] = None,
+    repeats: int = 3
+) -> List[Dict[str, Any]]:
+    """Time every operation on every shape and size"""
+    available = _operations(OutlineService())
+    names = operations or list(available)
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            items = make_outline(shape, size)
+            for name in names:
+                results.append({
+                    "operation": name,
+                    "shape": shape,
+                    "size": size,
+                    "seconds": measure(available[name], items, repeats),
+                })
+    return results
+
+
+def growth_exponent(results: List[Dict[str, Any]], operation: str, shape: str) -> float:
+    """Log-log slope of time against size between the smallest and largest run"""
+    runs = sorted(
+        (r for r in results if r["operation"] == operation and r["shape"] == shape),
+        key=lambda r: r["size"]
+    )
+    small, large = runs[0], runs[-1]
+    # Clamp to the timer resolution so tiny runs don't produce huge slopes
+    t_small = max(small["seconds"], 1e-6)
+    t_large = max(large["seconds"], 1e-6)
+    return math.log(t_large / t_small) / math.log(large["size"] / small["size"])
+
+
+def budget_violations(results: List[Dict[str, Any]]) -> List[str]:
+    """Operations whose growth exceeds their budget"""
+    violations = []
+    for operation in sorted({r["operation"] for r in results}):
+        for shape in sorted({r["shape"] for r in results}):
+            exponent = growth_exponent(results, operation, shape)
+            if exponent > BUDGETS[operation]:
+                violations.append(
+                    f"{operation} on {shape} outlines grows as n^{exponent:.2f} (budget n^{BUDGETS[operation]})"
+                )
+    return violations
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    sizes = sorted({r["size"] for r in results})
+    lines = [f"{'operation':<24} {'shape':<6} " + " ".join(f"{size:>10}" for size in sizes) + "   growth"]
+    for operation in dict.fromkeys(r["operation"] for r in results):
+        for shape in dict.fromkeys(r["shape"] for r in results):
+            times = {r["size"]: r["seconds"] for r in results if r["operation"] == operation and r["shape"] == shape}
+            cells = " ".join(f"{times[size] * 1000:>8.2f}ms" for size in sizes)
+            lines.append(f"{operation:<24} {shape:<6} {cells}   n^{growth_exponent(results, operation, shape):.2f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="OutlineService microbenchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    parser.add_argument("--shapes", default=",".join(SHAPES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON here")
+    args = parser.parse_args(argv)
+
+    results = sweep(
+        sizes=[int(size) for size in args.sizes.split(",")],
+        shapes=args.shapes.split(","),
+        repeats=args.repeats,
+    )
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"budgets": BUDGETS, "results": results}, f, indent=2)
+    violations = budget_violations(results)
+    for violation in violations:
+        print(f"OVER BUDGET: {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
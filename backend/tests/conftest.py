@@ -1,4 +1,5 @@
 """Pytest configuration and shared fixtures"""
+import os
 import pytest
 from typing import AsyncGenerator, Generator
 from httpx import AsyncClient, ASGITransport
@@ -12,6 +13,10 @@ from fixtures.mock_data import (
     get_auth_response
 )
 
+# Test modules import the app at collection time, so the storage backend
+# must be selected before any of them load app.core.config
+os.environ.setdefault("TESTING", "true")
+
 @pytest.fixture
 def test_app() -> FastAPI:
     """Create a test FastAPI application"""
@@ -77,4 +82,27 @@ def new_user_data():
 @pytest.fixture
 def voice_audio_blob():
     """Mock audio blob for voice testing"""
-    return b"mock audio data for testing"
\ No newline at end of file
+    return b"mock audio data for testing"
+@pytest.fixture
+def mock_db(test_app, tmp_path):
+    """Provide an empty mock database persisted to a temporary file"""
+    from app.db.mock_cosmos import mock_cosmos_client
+    
+    original = (
+        mock_cosmos_client.data_file, mock_cosmos_client.users,
+        mock_cosmos_client.documents, mock_cosmos_client.history
+    )
+    mock_cosmos_client.data_file = tmp_path / "mock_db_data.json"
+    mock_cosmos_client.users = {}
+    mock_cosmos_client.documents = {}
+    mock_cosmos_client.history = {}
+    yield mock_cosmos_client
+    (
+        mock_cosmos_client.data_file, mock_cosmos_client.users,
+        mock_cosmos_client.documents, mock_cosmos_client.history
+    ) = original
+
+@pytest.fixture
+def test_user_headers() -> dict:
+    """Headers that authenticate as a test user via the TESTING bypass"""
+    return {"X-Test-User-Id": "user_test"}
@@ -0,0 +1,109 @@
+"""Test the batch operation executor and endpoint"""
+import pytest
+from httpx import AsyncClient
+from app.models.outline import BatchOperation, OperationType
+from app.services.batch_service import BatchExecutor
+from app.services.outline_service import OutlineService
+
+
+@pytest.fixture
+def items():
+    return [
+        {"id": "a", "content": "A", "parentId": None, "order": 0, "rank": "1"},
+        {"id": "a1", "content": "A1", "parentId": "a", "order": 0, "rank": "1"},
+        {"id": "a1x", "content": "A1x", "parentId": "a1", "order": 0, "rank": "1"},
+        {"id": "b", "content": "B", "parentId": None, "order": 1, "rank": "2"},
+    ]
+
+
+def op(type, **kwargs):
+    return BatchOperation(type=OperationType(type), **kwargs)
+
+
+def test_executor_applies_all_operation_types(items):
+    """Test CREATE/UPDATE/MOVE/DELETE in one pass"""
+    executor = BatchExecutor(items, "outline_1")
+    results = executor.execute([
+        op("CREATE", id="tmp1", parentId="b", data={"text": "B1"}),
+        op("CREATE", parentId="tmp1", data={"text": "B1a"}),
+        op("UPDATE", id="b", data={"content": "B!"}),
+        op("MOVE", id="a1", parentId="b", position=0),
+        op("DELETE", id="a"),
+    ])
+
+    assert all(result.success for result in results)
+    created_id = results[0].id
+    assert results[0].ref == "tmp1" and created_id != "tmp1"
+
+    by_id = {item["id"]: item for item in executor.items}
+    assert set(by_id) == {"a1", "a1x", "b", created_id, results[1].id}
+    assert by_id[results[1].id]["parentId"] == created_id
+    assert by_id["b"]["content"] == "B!"
+
+    children = OutlineService().get_siblings(executor.items, "b")
+    assert [child["id"] for child in children] == ["a1", created_id]
+
+
+def test_executor_does_not_mutate_source_items(items):
+    """Test copy-on-write keeps the input list intact"""
+    snapshot = [dict(item) for item in items]
+    executor = BatchExecutor(items, "outline_1")
+    executor.execute([op("UPDATE", id="a", data={"text": "changed"}), op("DELETE", id="b")])
+    assert items == snapshot
+    assert executor.changed_ids() == {"a", "b"}
+
+
+def test_executor_rejects_cycles_and_missing_parents(items):
+    """Test parent and cycle validation"""
+    executor = BatchExecutor(items, "outline_1")
+    results = executor.execute([
+        op("MOVE", id="a", parentId="a1x"),
+        op("MOVE", id="a", parentId="a"),
+        op("CREATE", parentId="missing", data={"text": "x"}),
+        op("UPDATE", id="missing", data={"text": "x"}),
+    ])
+    assert [result.success for result in results] == [False, False, False, False]
+    assert "own subtree" in results[0].error
+    assert "Parent not found" in results[2].error
+    assert "Item not found" in results[3].error
+    assert {item["id"]: item["parentId"] for item in executor.items}["a"] is None
+
+
+def test_executor_handles_large_batches(items):
+    """Test that a large paste stays linear in the number of operations"""
+    operations = [op("CREATE", id=f"t{i}", parentId=f"t{i - 1}" if i % 10 else None, data={"text": str(i)})
+                  for i in range(2000)]
+    executor = BatchExecutor(items, "outline_1")
+    results = executor.execute(operations)
+    assert all(result.success for result in results)
+    assert len(executor.items) == len(items) + 2000
+
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_atomic_rolls_back(client: AsyncClient, mock_db, test_user_headers):
+    """Test atomic batches write nothing when an operation fails"""
+    outline = (await client.post("/api/v1/outlines", json={"title": "Batch"}, headers=test_user_headers)).json()
+    url = f"/api/v1/outlines/{outline['id']}/batch"
+
+    response = await client.post(url, headers=test_user_headers, json={
+        "atomic": True,
+        "operations": [
+            {"type": "CREATE", "data": {"text": "kept?"}},
+            {"type": "DELETE", "id": "missing"},
+        ]
+    })
+    assert response.status_code == 409
+    assert [r["success"] for r in response.json()["detail"]["results"]] == [True, False]
+    assert mock_db.documents[outline["id"]]["items"] == []
+
+    response = await client.post(url, headers=test_user_headers, json={
+        "operations": [
+            {"type": "CREATE", "data": {"text": "kept"}},
+            {"type": "DELETE", "id": "missing"},
+        ]
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is False
+    assert len(body["errors"]) == 1
+    assert [item["content"] for item in body["items"]] == ["kept"]
@@ -0,0 +1,167 @@
+"""Test the outline operation log, undo/redo and restore"""
+import json
+import time
+import pytest
+from httpx import AsyncClient
+from app.db.mock_cosmos import MockCosmosDBClient
+from app.services.history_service import (
+    ChangeTracker, HistoryError, OutlineHistory, apply_changes, invert
+)
+from benchmarks.tree_ops import make_outline as make_items
+
+
+def outline_with(items, title="Outline"):
+    return {"id": "outline_1", "title": title, "userId": "user_test", "items": items}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MockCosmosDBClient()
+    store.data_file = tmp_path / "history.json"
+    store.history = {}
+    return store
+
+
+def test_changes_invert_back_to_the_original():
+    """Test diffs are compact and applying the inverse restores the outline"""
+    outline = outline_with(make_items("bushy", 20))
+    original = json.loads(json.dumps(outline))
+    tracker = ChangeTracker(outline)
+
+    outline["title"] = "Renamed"
+    outline["items"][3]["content"] = "Edited"
+    outline["items"] = [item for item in outline["items"] if item["id"] != "item_5"]
+    outline["items"].append({"id": "new", "content": "Added", "parentId": None})
+    changes = tracker.changes(outline)
+
+    assert sorted(change["op"] for change in changes) == ["delete", "insert", "title", "update"]
+    update = next(change for change in changes if change["op"] == "update")
+    assert update == {"op": "update", "id": "item_3", "before": {"content": "Item 3"}, "after": {"content": "Edited"}}
+
+    items, title = apply_changes(outline["items"], outline["title"], invert(changes))
+    assert title == original["title"]
+    assert sorted(items, key=lambda i: i["id"]) == sorted(original["items"], key=lambda i: i["id"])
+
+
+@pytest.mark.asyncio
+async def test_undo_redo_and_restore(store):
+    """Test undo/redo stacks and point-in-time restore via snapshots"""
+    history = OutlineHistory(store, snapshot_interval=3, retention=100)
+    outline = outline_with([])
+    versions = [[]]
+    for n in range(7):
+        tracker = history.track(outline)
+        outline["items"] = outline["items"] + [{"id": f"i{n}", "content": f"Item {n}", "parentId": None}]
+        await history.record(outline, tracker, "create_item")
+        versions.append([item["id"] for item in outline["items"]])
+
+    assert outline["historySeq"] == 7
+    assert [s["seq"] for s in store.history["outline_1"]["snapshots"]] == [0, 3, 6]
+
+    await history.undo(outline)
+    await history.undo(outline)
+    assert [item["id"] for item in outline["items"]] == versions[5]
+    await history.redo(outline)
+    assert [item["id"] for item in outline["items"]] == versions[6]
+    assert history.position(outline) == {"seq": 10, "canUndo": True, "canRedo": True}
+
+    for seq in (0, 2, 4, 7):
+        items, _ = await history.state_at(outline, seq)
+        assert [item["id"] for item in items] == versions[seq]
+
+    await history.restore(outline, 2)
+    assert [item["id"] for item in outline["items"]] == versions[2]
+    assert outline["redoStack"] == []  # A new change clears redo
+    await history.undo(outline)
+    # List order is irrelevant (ranks order siblings); compare the item sets
+    assert sorted(item["id"] for item in outline["items"]) == versions[6]
+
+    with pytest.raises(HistoryError):
+        await history.state_at(outline, 99)
+
+
+@pytest.mark.asyncio
+async def test_retention_prunes_old_entries(store):
+    """Test storage stays bounded and pruned versions are reported"""
+    history = OutlineHistory(store, snapshot_interval=10, retention=20)
+    outline = outline_with([{"id": "a", "content": "", "parentId": None}])
+    for n in range(100):
+        tracker = history.track(outline)
+        outline["items"] = [{**outline["items"][0], "content": f"v{n}"}]
+        await history.record(outline, tracker, "update_item")
+
+    stored = store.history["outline_1"]
+    assert len(stored["entries"]) <= 30
+    assert len(stored["snapshots"]) <= 3
+    assert len(outline["undoStack"]) <= 30
+    with pytest.raises(HistoryError):
+        await history.state_at(outline, 5)
+    items, _ = await history.state_at(outline, 85)
+    assert items[0]["content"] == "v84"
+
+
+@pytest.mark.asyncio
+async def test_undo_deleted_subtree_endpoint(client: AsyncClient, mock_db, test_user_headers):
+    """Test recovering a deleted subtree through the API"""
+    outline = (await client.post("/api/v1/outlines", json={"title": "History"}, headers=test_user_headers)).json()
+    base = f"/api/v1/outlines/{outline['id']}"
+    parent = (await client.post(f"{base}/items", json={"content": "Parent"}, headers=test_user_headers)).json()
+    for n in range(3):
+        await client.post(f"{base}/items", json={"content": f"Child {n}", "parentId": parent["id"]}, headers=test_user_headers)
+
+    await client.delete(f"{base}/items/{parent['id']}", headers=test_user_headers)
+    assert (await client.get(f"{base}/items", headers=test_user_headers)).json() == []
+
+    response = await client.post(f"{base}/history/undo", headers=test_user_headers)
+    assert response.status_code == 200
+    assert response.json()["entry"]["action"] == "delete_item"
+    tree = (await client.get(f"{base}/items", headers=test_user_headers)).json()
+    assert [item["content"] for item in tree[0]["children"]] == ["Child 0", "Child 1", "Child 2"]
+
+    listing = (await client.get(f"{base}/history", headers=test_user_headers)).json()
+    assert [entry["kind"] for entry in listing["entries"]] == ["undo", "edit", "edit", "edit", "edit", "edit"]
+
+    response = await client.post(f"{base}/history/restore", json={"seq": 1}, headers=test_user_headers)
+    assert response.status_code == 200
+    tree = (await client.get(f"{base}/items", headers=test_user_headers)).json()
+    assert [item["content"] for item in tree] == ["Parent"] and tree[0]["children"] == []
+
+    await client.post(f"{base}/history/redo", headers=test_user_headers)  # Redo was cleared by the restore
+    response = await client.post(f"{base}/history/redo", headers=test_user_headers)
+    assert response.status_code == 409
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_history_storage_and_restore_latency(store):
+    """Benchmark: history size and restore latency on a 10k-item outline"""
+    history = OutlineHistory(store, snapshot_interval=50, retention=500)
+    outline = outline_with(make_items("bushy", 10_000))
+    outline_size = len(json.dumps(outline))
+    record_times = []
+    for n in range(1000):
+        tracker = history.track(outline)
+        item = outline["items"][(n * 37) % len(outline["items"])]
+        item["content"] = f"Edit {n}"
+        start = time.perf_counter()
+        await history.record(outline, tracker, "update_item")
+        record_times.append(time.perf_counter() - start)
+
+    stored = store.history["outline_1"]
+    entry_bytes = len(json.dumps(stored["entries"]))
+    snapshot_bytes = len(json.dumps(stored["snapshots"]))
+    restore_times = {}
+    for distance in (1, 25, 49):
+        seq = outline["historySeq"] - 50 - distance
+        start = time.perf_counter()
+        await history.state_at(outline, seq)
+        restore_times[distance] = time.perf_counter() - start
+
+    print(f"\noutline {outline_size / 1e6:.1f}MB; history after 1000 edits: "
+          f"{len(stored['entries'])} entries {entry_bytes / 1e3:.0f}KB, "
+          f"{len(stored['snapshots'])} snapshots {snapshot_bytes / 1e6:.1f}MB")
+    print("restore latency: " + ", ".join(f"{d} entries past snapshot {t * 1000:.1f}ms" for d, t in restore_times.items()))
+    # Storage: at most retention / interval + 2 snapshots plus the retained entries
+    assert len(stored["snapshots"]) <= 12
+    assert entry_bytes < outline_size
+    assert max(restore_times.values()) < 1.0
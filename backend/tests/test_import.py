@@ -0,0 +1,207 @@
+"""Test streaming Markdown and OPML import"""
+import copy
+import time
+import pytest
+from httpx import AsyncClient
+from app.services.export_service import OutlineExporter
+from app.services.import_service import (
+    ImportParseError, MarkdownParser, OpmlParser, OutlineImporter
+)
+from app.services.outline_service import OutlineService
+
+MARKDOWN = """# Goals
+Intro paragraph
+that wraps.
+
+- First
+  - Nested 😀
+    continued
+- Second
+1. Numbered
+
+## Notes
+> Quoted
+> twice
+
+```
+code block
+```
+"""
+
+
+def parse(parser, data: bytes, chunk_size: int):
+    entries = []
+    for start in range(0, len(data), chunk_size):
+        entries.extend(parser.feed(data[start:start + chunk_size]))
+    entries.extend(parser.close())
+    return entries
+
+
+def test_markdown_structure():
+    """Test headings, lists, paragraphs, quotes and code blocks"""
+    assert parse(MarkdownParser(), MARKDOWN.encode(), 1 << 16) == [
+        (0, "Goals", "header"),
+        (1, "Intro paragraph\nthat wraps.", None),
+        (1, "First", None),
+        (2, "Nested 😀\ncontinued", None),
+        (1, "Second", None),
+        (1, "Numbered", None),
+        (1, "Notes", "header"),
+        (2, "Quoted\ntwice", "quote"),
+        (2, "code block", "code"),
+    ]
+
+
+def test_markdown_chunk_boundaries():
+    """Test that byte-sized chunks, even mid-character, parse the same"""
+    data = MARKDOWN.encode()
+    assert parse(MarkdownParser(), data, 1) == parse(MarkdownParser(), data, len(data))
+
+
+def test_opml_parsing():
+    """Test nested outline elements in small chunks"""
+    data = b"""<?xml version="1.0"?><opml version="2.0"><head><title>T</title></head><body>
+        <outline text="A &amp; B"><outline text="A1" _style="header"/></outline>
+        <outline text="C"/></body></opml>"""
+    assert parse(OpmlParser(), data, 7) == [(0, "A & B", None), (1, "A1", "header"), (0, "C", None)]
+
+    with pytest.raises(ImportParseError):
+        parse(OpmlParser(), b"<opml><body><outline text='x'></body></opml>", 8)
+
+
+def test_importer_appends_after_existing_items():
+    """Test parents, ranks and placement after the target's children"""
+    service = OutlineService()
+    outline = {"id": "o", "items": [
+        {"id": "old", "content": "Old", "parentId": None, "order": 0},
+    ]}
+    importer = OutlineImporter(outline)
+    for level, content in [(0, "A"), (1, "A1"), (3, "A1x"), (1, "A2"), (0, "B")]:
+        outline["items"].append(importer.add(level, content))
+
+    tree = service.build_item_tree(outline["items"])
+    assert [node["content"] for node in tree] == ["Old", "A", "B"]
+    assert [node["content"] for node in tree[1]["children"]] == ["A1", "A2"]
+    assert tree[1]["children"][0]["children"][0]["content"] == "A1x"
+    # Only the open branch is tracked
+    assert [entry[0] for entry in importer.state["stack"]] == [0]
+
+
+def test_opml_round_trip():
+    """Test that an exported outline imports back to the same tree"""
+    source = {"id": "o", "title": "Trip", "items": [
+        {"id": "a", "content": "Pack <bags>", "parentId": None, "rank": "V", "style": "header"},
+        {"id": "a1", "content": "Socks", "parentId": "a", "rank": "V"},
+        {"id": "b", "content": "Go", "parentId": None, "rank": "k"},
+    ]}
+    exported = b"".join(OutlineExporter(source).stream("opml"))
+
+    target = {"id": "o", "title": "Trip", "items": []}
+    importer = OutlineImporter(target)
+    for entry in parse(OpmlParser(), exported, 5):
+        target["items"].append(importer.add(*entry))
+
+    assert b"".join(OutlineExporter(target).stream("opml")) == exported
+
+
+@pytest.mark.asyncio
+async def test_import_endpoint(client: AsyncClient, mock_db, test_user_headers):
+    """Test importing a Markdown upload below an existing item"""
+    outline = (await client.post("/api/v1/outlines", json={"title": "Doc"}, headers=test_user_headers)).json()
+    base = f"/api/v1/outlines/{outline['id']}"
+    parent = (await client.post(f"{base}/items", json={"content": "Imported"}, headers=test_user_headers)).json()
+
+    response = await client.post(
+        f"{base}/import?parentId={parent['id']}",
+        files={"file": ("notes.md", MARKDOWN.encode(), "text/markdown")},
+        headers=test_user_headers
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["status"] == "completed"
+    assert result["format"] == "md"
+    assert result["processed"] == 9
+
+    tree = (await client.get(f"{base}/items", headers=test_user_headers)).json()
+    assert len(tree) == 1
+    assert [node["content"] for node in tree[0]["children"]] == ["Goals"]
+
+    status_response = await client.get(f"{base}/import", headers=test_user_headers)
+    assert status_response.json()["importId"] == result["importId"]
+
+    bad = await client.post(
+        f"{base}/import", files={"file": ("x.opml", b"<opml><body>", "text/x-opml")}, headers=test_user_headers
+    )
+    assert bad.status_code == 400
+    assert bad.json()["detail"]["importId"]
+
+
+@pytest.mark.asyncio
+async def test_import_resumes_after_interruption(client: AsyncClient, mock_db, test_user_headers, monkeypatch):
+    """Test that a resumed import continues from the last written batch"""
+    from app.core.config import settings
+    from app.db.mock_cosmos import mock_cosmos_client
+
+    outline = (await client.post("/api/v1/outlines", json={"title": "Big"}, headers=test_user_headers)).json()
+    base = f"/api/v1/outlines/{outline['id']}"
+    upload = "".join(f"- Item {n}\n  - Child {n}\n" for n in range(50)).encode()
+
+    # Storage that keeps only what was written, and fails on the third batch
+    stored = {"doc": copy.deepcopy(await mock_cosmos_client.get_document(outline["id"], "user_test"))}
+    writes = []
+
+    async def get_document(doc_id, user_id):
+        return copy.deepcopy(stored["doc"])
+
+    async def update_document(doc_id, doc):
+        writes.append(doc_id)
+        if len(writes) == 3:
+            raise ConnectionError("connection lost")
+        stored["doc"] = copy.deepcopy(doc)
+        return doc
+
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 40)
+    monkeypatch.setattr(mock_cosmos_client, "get_document", get_document)
+    monkeypatch.setattr(mock_cosmos_client, "update_document", update_document)
+
+    with pytest.raises(ConnectionError):
+        await client.post(f"{base}/import", files={"file": ("big.md", upload)}, headers=test_user_headers)
+    interrupted = (await client.get(f"{base}/import", headers=test_user_headers)).json()
+    assert interrupted["status"] == "running"
+    assert interrupted["processed"] == 80
+
+    response = await client.post(
+        f"{base}/import?resume={interrupted['importId']}",
+        files={"file": ("big.md", upload)},
+        headers=test_user_headers
+    )
+    assert response.json()["status"] == "completed"
+    items = stored["doc"]["items"]
+    assert len(items) == 100
+    tree = OutlineService().build_item_tree(items)
+    assert [node["content"] for node in tree] == [f"Item {n}" for n in range(50)]
+    assert all(node["children"][0]["content"] == f"Child {n}" for n, node in enumerate(tree))
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_import_50k_lines(client: AsyncClient, mock_db, test_user_headers):
+    """Benchmark: import a 50k line Markdown document"""
+    outline = (await client.post("/api/v1/outlines", json={"title": "Huge"}, headers=test_user_headers)).json()
+    upload = "".join(
+        f"# Section {s}\n" + "".join(f"- Point {n}\n  - Detail {n}\n" for n in range(2499)) + "\n"
+        for s in range(10)
+    ).encode()
+
+    start = time.perf_counter()
+    response = await client.post(
+        f"/api/v1/outlines/{outline['id']}/import",
+        files={"file": ("huge.md", upload)},
+        headers=test_user_headers
+    )
+    elapsed = time.perf_counter() - start
+
+    result = response.json()
+    print(f"\nimported {result['processed']} items in {result['batches']} writes, {elapsed:.2f}s")
+    assert result["processed"] == 49990
+    assert result["batches"] == 50
@@ -0,0 +1,106 @@
+"""Test compact item records and their memory footprint"""
+import json
+import tracemalloc
+from datetime import datetime
+from typing import List
+import pytest
+from pydantic import TypeAdapter
+from app.models.outline import OutlineItem
+from app.services.item_record import (
+    ItemRecord, encode_records, iter_encode_records, records_to_dicts
+)
+from app.services.ordering import spread_ranks
+from app.services.outline_service import OutlineService
+
+
+def make_items(count: int, fanout: int = 10) -> List[dict]:
+    """A balanced outline with ``count`` items"""
+    now = datetime.utcnow().isoformat()
+    ranks = spread_ranks(fanout)
+    items = []
+    for n in range(count):
+        parent = (n - 1) // fanout if n else None
+        items.append({
+            "id": f"item_{n:08d}",
+            "content": f"Item number {n} with some typical outline text",
+            "parentId": f"item_{parent:08d}" if parent is not None else None,
+            "outlineId": "outline_1",
+            "order": n % fanout,
+            "rank": ranks[(n - 1) % fanout] if n else ranks[0],
+            "style": "normal",
+            "formatting": None,
+            "createdAt": now,
+            "updatedAt": now,
+        })
+    return items
+
+
+def test_record_shares_values_with_item():
+    """Test that records reference stored values instead of copying them"""
+    item = make_items(1)[0]
+    record = ItemRecord(item)
+    assert record.content is item["content"]
+    assert not hasattr(record, "__dict__")
+
+
+def test_records_to_dicts_drops_unset_fields():
+    """Test dict conversion keeps parentId and drops other empty fields"""
+    record = ItemRecord({"id": "a", "content": "A", "parentId": None})
+    record.children.append(ItemRecord({"id": "b", "content": "B", "parentId": "a", "style": "header"}))
+    assert records_to_dicts([record]) == [{
+        "id": "a", "content": "A", "parentId": None, "order": 0, "children": [
+            {"id": "b", "content": "B", "parentId": "a", "order": 0, "style": "header", "children": []}
+        ]
+    }]
+
+
+def test_encode_records_matches_response_models():
+    """Test the JSON encoding matches what the OutlineItem response model produced"""
+    items = make_items(40, fanout=3)
+    service = OutlineService()
+    adapter = TypeAdapter(List[OutlineItem])
+    expected = json.loads(adapter.dump_json(adapter.validate_python(service.build_item_tree(items))))
+    assert json.loads(encode_records(service.build_records(items))) == expected
+
+    truncated = service.build_records(items, depth=0)
+    assert json.loads(encode_records(truncated))[0]["childCount"] == 3
+
+
+def test_deep_outline_converts_without_recursion():
+    """Test that very deep outlines convert to dicts"""
+    items = [{"id": str(n), "content": "x", "parentId": str(n - 1) if n else None} for n in range(5000)]
+    tree = OutlineService().build_item_tree(items)
+    depth = 0
+    while tree:
+        depth += 1
+        tree = tree[0]["children"]
+    assert depth == 5000
+
+
+@pytest.mark.slow
+def test_items_response_memory_10k():
+    """Benchmark: peak memory to serve a 10k item outline"""
+    items = make_items(10_000)
+    service = OutlineService()
+    adapter = TypeAdapter(List[OutlineItem])
+
+    def peak_memory(build):
+        tracemalloc.start()
+        size = build()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size, peak
+
+    # Previous path: dict copies validated into models, then serialized
+    old_size, old_peak = peak_memory(
+        lambda: len(adapter.dump_json(adapter.validate_python(service.build_item_tree(items))))
+    )
+    # Record path, consuming the body chunk by chunk like the server does
+    new_size, new_peak = peak_memory(
+        lambda: sum(len(chunk) for chunk in iter_encode_records(service.build_records(items)))
+    )
+
+    print(f"\n10k items ({new_size / 1e6:.1f}MB body): model path peak {old_peak / 1e6:.1f}MB, "
+          f"record path peak {new_peak / 1e6:.1f}MB")
+    assert new_size == old_size
+    assert new_peak * 4 < old_peak
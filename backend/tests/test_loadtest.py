@@ -0,0 +1,73 @@
+"""Test the load-test harness on a small run"""
+import json
+import random
+import pytest
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.loadtest import LoadConfig, parse_mix, percentile, plan, run_load
+from benchmarks.synthetic import make_items
+
+
+def test_synthetic_items_form_a_bounded_tree():
+    """Test generated outlines respect size and depth"""
+    items = make_items("outline_1", 500, 3, random.Random(1))
+    by_id = {item["id"]: item for item in items}
+    assert len(items) == 500
+
+    def depth(item):
+        level = 0
+        while item["parentId"]:
+            item = by_id[item["parentId"]]
+            level += 1
+        return level
+
+    assert max(depth(item) for item in items) == 2
+
+
+def test_plan_is_reproducible():
+    """Test the scenario sequence only depends on the seed"""
+    config = LoadConfig(iterations=5, mix=parse_mix("browse=3,paste=1"), seed=7)
+    users = ["a", "b"]
+    first = [(user, name) for user, name, _ in plan(config, users)]
+    assert first == [(user, name) for user, name, _ in plan(config, users)]
+    assert {name for _, name in first} <= {"browse", "paste"}
+    with pytest.raises(ValueError):
+        parse_mix("browse=1,fly=2")
+
+
+def test_percentile():
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_small_run_covers_every_scenario(tmp_path):
+    """Test a run with every scenario completes without errors"""
+    config = LoadConfig(
+        users=2, outlines_per_user=1, items_per_outline=30, concurrency=2, iterations=6,
+        mix={name: 1 for name in ("browse", "type", "indent", "paste", "voice", "llm")},
+        paste_size=10, llm_latency=0.0
+    )
+    report = await run_load(config)
+
+    assert report["summary"]["errors"] == 0
+    assert report["summary"]["requests"] == sum(op["count"] for op in report["operations"].values())
+    assert sum(report["summary"]["scenarios"].values()) == 12
+    for op in report["operations"].values():
+        assert op["p50Ms"] <= op["p90Ms"] <= op["p99Ms"] <= op["maxMs"]
+    # The report is plain JSON
+    (tmp_path / "report.json").write_text(json.dumps(report))
+
+
+def test_fake_llm_server_speaks_chat_completions():
+    """Test the OpenAI client accepts the fake server's responses"""
+    from openai import OpenAI
+
+    with FakeLLMServer(latency=0) as server:
+        client = OpenAI(api_key="fake", base_url=server.base_url)
+        response = client.chat.completions.create(
+            model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}]
+        )
+    assert "items" in json.loads(response.choices[0].message.content)
+    assert server.requests == 1
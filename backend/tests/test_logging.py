@@ -0,0 +1,73 @@
+"""Test structured queue-based logging"""
+import io
+import json
+import logging
+import pytest
+from app.core.config import settings
+from app.core.logging_config import configure_logging, parse_levels, shutdown_logging
+
+
+@pytest.fixture
+def log_output():
+    """Reconfigure logging into a buffer; yields a function that flushes and parses it"""
+    stream = io.StringIO()
+
+    def setup(**overrides):
+        configure_logging(settings.model_copy(update=overrides), stream=stream)
+
+    def read():
+        shutdown_logging()  # Stopping the listener drains the queue
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    setup.read = read
+    yield setup
+    configure_logging(settings)
+
+
+def test_json_records_with_extras(log_output):
+    """Test records are written as JSON with extras and exception text"""
+    log_output()
+    logger = logging.getLogger("app.test")
+    logger.info("Outline %s loaded", "outline_1", extra={"itemCount": 3})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed")
+
+    records = log_output.read()
+    assert records[0]["level"] == "INFO"
+    assert records[0]["logger"] == "app.test"
+    assert records[0]["message"] == "Outline outline_1 loaded"
+    assert records[0]["itemCount"] == 3
+    assert records[1]["message"] == "Failed"
+    assert "ValueError: boom" in records[1]["exc"]
+
+
+def test_prompts_are_redacted(log_output):
+    """Test prompt and response bodies never reach the output"""
+    log_output()
+    logging.getLogger("app.test").info("LLM call", extra={"prompt": "secret plan", "response": "x" * 40})
+
+    record = log_output.read()[0]
+    assert record["prompt"] == "<redacted 11 chars>"
+    assert record["response"] == "<redacted 40 chars>"
+
+
+def test_module_levels_and_debug_sampling(log_output):
+    """Test per-module levels and that sampling only drops DEBUG records"""
+    log_output(LOG_LEVELS="app.verbose=DEBUG,app.quiet=ERROR", LOG_DEBUG_SAMPLE_RATE=0.0)
+    logging.getLogger("app.verbose").debug("sampled out")
+    logging.getLogger("app.verbose").info("kept")
+    logging.getLogger("app.quiet").warning("below module level")
+    logging.getLogger("app.other").debug("below root level")
+
+    assert [record["message"] for record in log_output.read()] == ["kept"]
+    # Levels are reset when logging is shut down
+    assert logging.getLogger("app.quiet").level == logging.NOTSET
+
+
+def test_parse_levels():
+    """Test the per-module level setting format"""
+    assert parse_levels(" app.db=warning, app.api=DEBUG ,") == {"app.db": logging.WARNING, "app.api": logging.DEBUG}
+    with pytest.raises(ValueError):
+        parse_levels("app.db=LOUD")
@@ -0,0 +1,138 @@
+"""Test fractional rank keys and rank-based sibling ordering"""
+import random
+import pytest
+from app.services.ordering import (
+    MAX_RANK_LENGTH, rank_between, spread_ranks, item_sort_key
+)
+from app.services.outline_service import OutlineService
+
+
+@pytest.fixture
+def outline_service():
+    return OutlineService()
+
+
+@pytest.fixture
+def legacy_items():
+    """Items that only carry the old dense integer order"""
+    return [
+        {"id": "a", "content": "A", "parentId": None, "order": 0},
+        {"id": "b", "content": "B", "parentId": None, "order": 1},
+        {"id": "c", "content": "C", "parentId": None, "order": 2},
+        {"id": "b1", "content": "B1", "parentId": "b", "order": 0},
+    ]
+
+
+def test_rank_between_open_bounds():
+    """Test ranks generated at the start, end and middle"""
+    first = rank_between(None, None)
+    before = rank_between(None, first)
+    after = rank_between(first, None)
+    assert before < first < after
+    assert before < rank_between(before, first) < first
+
+
+def test_rank_between_rejects_inverted_bounds():
+    """Test that bounds out of order are rejected"""
+    with pytest.raises(ValueError):
+        rank_between("b", "a")
+
+
+def test_rank_between_always_finds_room():
+    """Test repeated inserts at random positions keep a strict order"""
+    rng = random.Random(42)
+    ranks = [rank_between(None, None)]
+    for _ in range(2000):
+        position = rng.randint(0, len(ranks))
+        before = ranks[position - 1] if position > 0 else None
+        after = ranks[position] if position < len(ranks) else None
+        ranks.insert(position, rank_between(before, after))
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == len(ranks)
+    assert not any(rank.endswith("0") for rank in ranks)
+
+
+def test_spread_ranks_are_sorted_and_short():
+    """Test evenly spread ranks"""
+    for count in (1, 61, 62, 5000):
+        ranks = spread_ranks(count)
+        assert len(ranks) == count
+        assert ranks == sorted(ranks)
+        assert len(set(ranks)) == count
+        assert max(len(rank) for rank in ranks) <= 3
+
+
+def test_item_sort_key_prefers_rank_then_order():
+    """Test ranked items sort by rank and legacy items by order"""
+    items = [
+        {"id": "x", "order": 5, "rank": "b"},
+        {"id": "y", "order": 9, "rank": "a"},
+    ]
+    assert [i["id"] for i in sorted(items, key=item_sort_key)] == ["y", "x"]
+
+
+def test_place_item_converts_legacy_group_once(outline_service, legacy_items):
+    """Test the first insert converts integer order to ranks"""
+    new_item = {"id": "d", "content": "D", "parentId": None, "order": 0}
+    outline_service.place_item(legacy_items, new_item, None, 1)
+    legacy_items.append(new_item)
+
+    roots = outline_service.get_siblings(legacy_items, None)
+    assert [i["id"] for i in roots] == ["a", "d", "b", "c"]
+    assert all(item.get("rank") for item in roots)
+    # Other sibling groups are left alone
+    assert "rank" not in legacy_items[3]
+
+
+def test_place_item_only_touches_moved_item(outline_service, legacy_items):
+    """Test moves on a ranked group rewrite a single item"""
+    outline_service.rebalance_ranks(outline_service.get_siblings(legacy_items, None))
+    before = {item["id"]: dict(item) for item in legacy_items}
+
+    outline_service.place_item(legacy_items, legacy_items[2], None, 0)
+
+    changed = [item["id"] for item in legacy_items if item != before[item["id"]]]
+    assert changed == ["c"]
+    assert [i["id"] for i in outline_service.get_siblings(legacy_items, None)] == ["c", "a", "b"]
+
+
+def test_place_item_rebalances_long_ranks(outline_service):
+    """Test that a group is respread once ranks get too long"""
+    items = [
+        {"id": "first", "parentId": None, "rank": "1"},
+        {"id": "last", "parentId": None, "rank": "2"},
+    ]
+    for i in range(200):
+        new_item = {"id": f"n{i}", "parentId": None}
+        outline_service.place_item(items, new_item, None, 1)
+        items.append(new_item)
+
+    assert max(len(item["rank"]) for item in items) <= MAX_RANK_LENGTH
+    ordered = outline_service.get_siblings(items, None)
+    assert ordered[0]["id"] == "first"
+    assert ordered[-1]["id"] == "last"
+    assert ordered[1]["id"] == "n199"
+
+
+def test_indent_and_outdent_with_ranks(outline_service, legacy_items):
+    """Test indent makes the first child and outdent places after the parent"""
+    indented = outline_service.indent_item(legacy_items, "c")
+    assert indented["parentId"] == "b"
+    assert [i["id"] for i in outline_service.get_siblings(legacy_items, "b")] == ["c", "b1"]
+
+    outline_service.indent_item(legacy_items, "b1")
+    assert legacy_items[3]["parentId"] == "c"
+
+    outdented = outline_service.outdent_item(legacy_items, "b1")
+    assert outdented["parentId"] == "b"
+    assert [i["id"] for i in outline_service.get_siblings(legacy_items, "b")] == ["c", "b1"]
+
+
+def test_build_item_tree_reports_positions_for_ranked_items(outline_service):
+    """Test that ranked items are returned with positional order"""
+    items = [
+        {"id": "a", "content": "A", "parentId": None, "order": 7, "rank": "k"},
+        {"id": "b", "content": "B", "parentId": None, "order": 7, "rank": "V"},
+    ]
+    tree = outline_service.build_item_tree(items)
+    assert [(i["id"], i["order"]) for i in tree] == [("b", 0), ("a", 1)]
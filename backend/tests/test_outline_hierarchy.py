@@ -224,4 +224,44 @@ def test_build_item_tree_prevents_self_reference(outline_service):
     tree = outline_service.build_item_tree(items)
     
     # Item with self-reference should not be included as root
-    assert len(tree) == 0
\ No newline at end of file
+    assert len(tree) == 0
+def test_build_subtree_from_root_item(outline_service, nested_items):
+    """Test fetching the subtree under a single item"""
+    subtree = outline_service.build_subtree(nested_items, root_id="item_1_2")
+
+    assert len(subtree) == 1
+    root = subtree[0]
+    assert root["id"] == "item_1_2"
+    assert root["order"] == 1  # Position among its real siblings
+    assert [child["id"] for child in root["children"]] == ["item_1_2_1", "item_1_2_2"]
+    assert "hasChildren" not in root
+
+def test_build_subtree_truncates_at_depth(outline_service, nested_items):
+    """Test that nodes below the depth limit become stubs"""
+    subtree = outline_service.build_subtree(nested_items, depth=1)
+
+    root = subtree[0]
+    assert root["id"] == "item_1"
+    assert count_all_items(subtree) == 4
+
+    child2 = root["children"][1]
+    assert child2["id"] == "item_1_2"
+    assert child2["children"] == []
+    assert child2["hasChildren"] is True
+    assert child2["childCount"] == 2
+    # Leaves are not stubs
+    assert "hasChildren" not in root["children"][0]
+
+def test_build_subtree_depth_zero_returns_only_root(outline_service, nested_items):
+    """Test depth=0 returns the starting items as stubs"""
+    subtree = outline_service.build_subtree(nested_items, root_id="item_1", depth=0)
+    assert subtree[0]["children"] == []
+    assert subtree[0]["childCount"] == 3
+
+def test_build_subtree_unknown_root(outline_service, nested_items):
+    """Test that a missing root is reported as None"""
+    assert outline_service.build_subtree(nested_items, root_id="missing") is None
+
+def test_build_subtree_without_limits_matches_full_tree(outline_service, nested_items):
+    """Test that an unlimited subtree equals the full tree"""
+    assert outline_service.build_subtree(nested_items) == outline_service.build_item_tree(nested_items)
@@ -0,0 +1,148 @@
+"""Test the full-text search index and endpoint"""
+import random
+import statistics
+import time
+import pytest
+from httpx import AsyncClient
+from app.services.search_service import SearchService, UserSearchIndex, tokenize
+
+
+def make_outline(outline_id, items, title="Outline", updated_at="2024-01-01T00:00:00"):
+    return {"id": outline_id, "title": title, "userId": "user_test", "items": items, "updatedAt": updated_at}
+
+
+def item(item_id, content, parent_id=None):
+    return {"id": item_id, "content": content, "parentId": parent_id}
+
+
+class FakeStorage:
+    """Minimal stand-in for the document store"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.calls = 0
+
+    async def get_user_documents(self, user_id):
+        self.calls += 1
+        return list(self.documents)
+
+
+@pytest.fixture
+def index():
+    index = UserSearchIndex()
+    index.index_outline(make_outline("o1", [
+        item("a", "Customer retention strategy"),
+        item("b", "Reduce churn with onboarding", "a"),
+        item("c", "Retention metrics dashboard", "b"),
+    ], title="Growth"))
+    index.index_outline(make_outline("o2", [
+        item("x", "Shopping list: milk and eggs"),
+    ]))
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Hello, World! SPOV-4") == ["hello", "world", "spov", "4"]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_matches(index):
+    """Test BM25 ranking across outlines"""
+    results = index.search("retention")
+    assert [key for key, _ in results] == ["o1:a", "o1:c"] or [key for key, _ in results] == ["o1:c", "o1:a"]
+    assert index.search("milk")[0][0] == "o2:x"
+    assert index.search("nothing here") == []
+
+
+def test_search_prefix_matching(index):
+    """Test that partial words match longer terms"""
+    assert {key for key, _ in index.search("reten")} == {"o1:a", "o1:c"}
+    assert {key for key, _ in index.search("onb")} == {"o1:b"}
+
+
+def test_incremental_updates(index):
+    """Test edits and deletions are reflected without a rebuild"""
+    index.index_outline(make_outline("o1", [
+        item("a", "Customer loyalty strategy"),
+        item("b", "Reduce churn with onboarding", "a"),
+    ], title="Growth"))
+
+    assert {key for key, _ in index.search("retention")} == set()
+    assert {key for key, _ in index.search("loyalty")} == {"o1:a"}
+    assert "o1:c" not in index.docs
+
+    index.remove_outline("o2")
+    assert index.search("milk") == []
+
+
+def test_breadcrumbs(index):
+    """Test ancestors are returned outermost first"""
+    assert [crumb["id"] for crumb in index.breadcrumbs("o1:c")] == ["a", "b"]
+    assert index.breadcrumbs("o1:a") == []
+
+
+@pytest.mark.asyncio
+async def test_service_persists_and_catches_up(tmp_path):
+    """Test lazy load from disk plus reindexing of outlines changed meanwhile"""
+    storage = FakeStorage([make_outline("o1", [item("a", "alpha beta")])])
+    service = SearchService(index_dir=str(tmp_path), flush_delay=0)
+    assert len(await service.search("user_test", "alpha", storage)) == 1
+    service.flush()
+
+    # Outline edited while no index was loaded
+    storage.documents = [make_outline("o1", [item("a", "gamma")], updated_at="2024-02-01T00:00:00")]
+    restarted = SearchService(index_dir=str(tmp_path))
+    assert await restarted.search("user_test", "alpha", storage) == []
+    results = await restarted.search("user_test", "gamma", storage)
+    assert results[0]["itemId"] == "a"
+    assert storage.calls == 2  # One sync per process, then served from memory
+
+
+@pytest.mark.asyncio
+async def test_search_endpoint(client: AsyncClient, mock_db, test_user_headers, tmp_path):
+    """Test searching after creating items through the API"""
+    from app.services.search_service import search_service
+    search_service.index_dir = tmp_path
+    search_service.indexes.clear()
+
+    outline = (await client.post("/api/v1/outlines", json={"title": "Plans"}, headers=test_user_headers)).json()
+    items_url = f"/api/v1/outlines/{outline['id']}/items"
+    parent = (await client.post(items_url, json={"content": "Quarterly goals"}, headers=test_user_headers)).json()
+
+    response = await client.get("/api/v1/search?q=quarter", headers=test_user_headers)
+    assert response.status_code == 200
+    assert [r["itemId"] for r in response.json()["results"]] == [parent["id"]]
+
+    # Index is now loaded, so new items are picked up incrementally
+    await client.post(items_url, json={"content": "Grow revenue", "parentId": parent["id"]}, headers=test_user_headers)
+    results = (await client.get("/api/v1/search?q=revenue", headers=test_user_headers)).json()["results"]
+    assert results[0]["outlineTitle"] == "Plans"
+    assert [crumb["content"] for crumb in results[0]["breadcrumbs"]] == ["Quarterly goals"]
+
+
+@pytest.mark.slow
+def test_query_latency_at_100k_items():
+    """Benchmark: query latency with 100k items for one user"""
+    rng = random.Random(7)
+    vocabulary = [f"{rng.choice(['re', 'pro', 'con', 'in', 'de'])}{''.join(rng.choices('abcdefghijklmnop', k=rng.randint(3, 8)))}"
+                  for _ in range(20_000)]
+    index = UserSearchIndex()
+    for outline_number in range(10):
+        items = [
+            item(f"i{outline_number}_{n}", " ".join(rng.choices(vocabulary, k=rng.randint(3, 15))))
+            for n in range(10_000)
+        ]
+        index.index_outline(make_outline(f"o{outline_number}", items))
+    assert len(index.docs) == 100_000
+
+    queries = [rng.choice(vocabulary) for _ in range(50)] + [rng.choice(vocabulary)[:3] for _ in range(50)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p50 = statistics.median(timings)
+    p95 = timings[int(len(timings) * 0.95)]
+    print(f"\n100k items: p50={p50:.2f}ms p95={p95:.2f}ms")
+    assert p95 < 250
@@ -0,0 +1,45 @@
+"""Complexity budgets for the OutlineService tree algorithms"""
+import pytest
+from app.services.outline_service import OutlineService
+from benchmarks.tree_ops import budget_violations, format_results, make_outline, sweep
+
+
+@pytest.mark.parametrize("shape", ["flat", "deep", "bushy"])
+def test_shapes(shape):
+    """Test generated outlines build into the expected tree"""
+    items = make_outline(shape, 73)
+    tree = OutlineService().build_item_tree(items)
+    roots = {"flat": 73, "deep": 1, "bushy": 1}[shape]
+    assert len(tree) == roots
+
+
+def test_subtree_of_deep_chain_without_recursion():
+    """Test collecting descendants of a chain deeper than the recursion limit"""
+    items = make_outline("deep", 5000)
+    ids = OutlineService().get_item_and_children(items, "item_2500")
+    assert len(ids) == 2500
+
+
+def test_subtree_with_circular_parents():
+    """Test a parent cycle does not loop forever"""
+    items = [
+        {"id": "a", "parentId": "c"},
+        {"id": "b", "parentId": "a"},
+        {"id": "c", "parentId": "b"},
+        {"id": "d", "parentId": None},
+    ]
+    assert OutlineService().get_item_and_children(items, "a") == {"a", "b", "c"}
+
+
+def test_complexity_budgets():
+    """Test no tree operation grows faster than its budget (catches O(n^2))"""
+    results = sweep(sizes=(1_000, 8_000), repeats=3)
+    assert budget_violations(results) == [], format_results(results)
+
+
+@pytest.mark.slow
+def test_full_sweep():
+    """Benchmark: 100 to 100k items across every shape and operation"""
+    results = sweep()
+    print("\n" + format_results(results))
+    assert budget_violations(results) == []
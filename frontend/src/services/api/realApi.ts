@@ -189,8 +189,13 @@ export const outlineService = {
   },
 
   // Outline Items
-  async getOutlineItems(outlineId: string): Promise<OutlineItem[]> {
-    const response = await fetch(getApiUrl(`/outlines/${outlineId}/items`), {
+  async getOutlineItems(outlineId: string, options: { root?: string; depth?: number } = {}): Promise<OutlineItem[]> {
+    // root/depth fetch a single branch; truncated nodes come back with hasChildren/childCount
+    const query = new URLSearchParams();
+    if (options.root) query.set('root', options.root);
+    if (options.depth !== undefined) query.set('depth', String(options.depth));
+    const params = query.toString() ? `?${query}` : '';
+    const response = await fetch(getApiUrl(`/outlines/${outlineId}/items${params}`), {
       headers: getAuthHeaders()
     });
     
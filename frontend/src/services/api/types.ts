@@ -188,7 +188,10 @@ export interface OutlineItem {
   parentId?: string | null;
   outlineId: string;
   order: number;
+  rank?: string;
   children: OutlineItem[];
+  hasChildren?: boolean;  // Set on nodes truncated by a depth-limited fetch
+  childCount?: number;
   style?: 'header' | 'code' | 'quote' | 'normal';
   formatting?: {
     bold?: boolean;